@@ -0,0 +1,457 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+图片单词生成器基准测试
+使用自带的 images 文件夹和 example_words.txt，按 主题 × 设备模式 × 背景样式 的所有组合渲染单词卡片，
+统计吞吐量、各渲染阶段的耗时分位数和峰值内存，并将结果写入JSON文件，便于在不同提交之间对比；
+也可以比较各种背景模糊方式的速度及其与PIL高斯模糊结果的差异(PSNR/SSIM)
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import List, Dict, Optional
+
+# 第三方库
+import cv2
+import numpy as np
+import PIL
+
+from image_word_generator import ImageWordGenerator, ImageEncoder
+
+THEMES = ["standard", "focus", "elegant", "dark", "minimal"]
+DEVICE_MODES = ["auto", "mobile", "tablet", "desktop"]
+BG_STYLES = ["rectangle", "wave"]
+
+# 渲染阶段，顺序与 add_text_to_image 中的处理顺序一致
+STAGES = ["decode", "resize", "blur", "brightness", "layout", "composite", "text", "encode"]
+
+BLUR_BACKENDS = ["gaussian", "downscale", "box"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    计算分位数（线性插值）
+    
+    参数:
+        values: 数值列表
+        pct: 百分位，0-100
+    
+    返回:
+        分位数，列表为空时返回0
+    """
+    if not values:
+        return 0.0
+    return float(np.percentile(values, pct))
+
+
+def psnr(reference: np.ndarray, image: np.ndarray) -> float:
+    """
+    计算峰值信噪比(dB)
+    
+    参数:
+        reference: 参考图像
+        image: 待比较图像，尺寸与参考图像相同
+    
+    返回:
+        PSNR，两幅图像完全相同时返回inf
+    """
+    mse = np.mean((reference.astype(np.float64) - image.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def ssim(reference: np.ndarray, image: np.ndarray) -> float:
+    """
+    计算灰度结构相似度，使用 11×11、sigma=1.5 的高斯窗口
+    
+    参数:
+        reference: 参考图像(RGB或RGBA)
+        image: 待比较图像，尺寸与参考图像相同
+    
+    返回:
+        SSIM平均值，1表示完全相同
+    """
+    a = cv2.cvtColor(np.ascontiguousarray(reference[..., :3]), cv2.COLOR_RGB2GRAY).astype(np.float64)
+    b = cv2.cvtColor(np.ascontiguousarray(image[..., :3]), cv2.COLOR_RGB2GRAY).astype(np.float64)
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    
+    def window(x: np.ndarray) -> np.ndarray:
+        return cv2.GaussianBlur(x, (11, 11), 1.5)
+    
+    mean_a, mean_b = window(a), window(b)
+    var_a = window(a * a) - mean_a * mean_a
+    var_b = window(b * b) - mean_b * mean_b
+    covariance = window(a * b) - mean_a * mean_b
+    ssim_map = ((2 * mean_a * mean_b + c1) * (2 * covariance + c2)) / \
+               ((mean_a * mean_a + mean_b * mean_b + c1) * (var_a + var_b + c2))
+    return float(ssim_map.mean())
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    获取当前进程的峰值常驻内存(MB)
+    
+    返回:
+        峰值内存，当前系统不支持时返回None
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回KB
+    if platform.system() == "Darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def git_revision() -> Optional[str]:
+    """
+    获取当前代码的git提交号
+    
+    返回:
+        提交号，不在git仓库中时返回None
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+class RendererBenchmark:
+    """单词卡片渲染基准测试"""
+    
+    def __init__(self,
+                 images_folder: str = "images",
+                 word_list_file: str = "example_words.txt",
+                 cards: int = 10,
+                 bg_cache_bytes: int = 256 * 1024 * 1024,
+                 encoder: Optional[ImageEncoder] = None):
+        """
+        初始化基准测试
+        
+        参数:
+            images_folder: 背景图片文件夹路径
+            word_list_file: 单词列表文件路径
+            cards: 每个组合渲染的卡片数量，单词不足时循环使用
+            bg_cache_bytes: 预处理背景缓存的内存上限（字节）
+            encoder: 输出图片编码器，不指定则保存为质量95的JPEG
+        """
+        self.images_folder = images_folder
+        self.word_list_file = word_list_file
+        self.cards = cards
+        self.bg_cache_bytes = bg_cache_bytes
+        self.encoder = encoder if encoder is not None else ImageEncoder()
+    
+    def run_combination(self, theme: str, device_mode: str, bg_style: str, output_folder: str) -> Dict:
+        """
+        渲染一个 主题 × 设备模式 × 背景样式 组合并统计耗时
+        
+        参数:
+            theme: 主题风格
+            device_mode: 设备模式
+            bg_style: 背景样式
+            output_folder: 输出图片文件夹路径
+        
+        返回:
+            该组合的统计结果
+        """
+        stage_times = {stage: [] for stage in STAGES}
+        
+        def observe(stage: str, seconds: float) -> None:
+            stage_times.setdefault(stage, []).append(seconds)
+        
+        with redirect_stdout(io.StringIO()):
+            generator = ImageWordGenerator(
+                images_folder=self.images_folder,
+                output_folder=output_folder,
+                theme=theme,
+                device_mode=device_mode,
+                bg_style=bg_style,
+                bg_cache_bytes=self.bg_cache_bytes,
+                seed=0,
+                encoder=self.encoder
+            )
+            words = list(generator.read_word_list(self.word_list_file))
+        generator.stage_observer = observe
+        
+        latencies = []
+        output_sizes = []
+        failures = 0
+        wall_start = time.perf_counter()
+        for i in range(self.cards):
+            word_data = words[i % len(words)]
+            image_path = generator.select_background(i, word_data)
+            output_path = os.path.join(output_folder, f"{theme}_{device_mode}_{bg_style}_{i:03d}{self.encoder.extension}")
+            
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                result, output_bytes = generator._write_card(image_path, word_data[0], word_data[1], word_data[2], output_path)
+            latencies.append(time.perf_counter() - start)
+            if result is None:
+                failures += 1
+            else:
+                output_sizes.append(output_bytes)
+        wall = time.perf_counter() - wall_start
+        
+        return {
+            "theme": theme,
+            "device_mode": device_mode,
+            "bg_style": bg_style,
+            "cards": self.cards,
+            "failures": failures,
+            "wall_seconds": round(wall, 4),
+            "cards_per_sec": round(self.cards / wall, 3) if wall > 0 else None,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 3),
+                "p95": round(percentile(latencies, 95) * 1000, 3)
+            },
+            "stages_ms": {
+                stage: {
+                    "count": len(times),
+                    "p50": round(percentile(times, 50) * 1000, 3),
+                    "p95": round(percentile(times, 95) * 1000, 3),
+                    "total": round(sum(times) * 1000, 3)
+                }
+                for stage, times in stage_times.items()
+            },
+            "output_kb": {
+                "mean": round(sum(output_sizes) / len(output_sizes) / 1024, 1) if output_sizes else None,
+                "total": round(sum(output_sizes) / 1024, 1)
+            }
+        }
+    
+    def run(self, themes: List[str], device_modes: List[str], bg_styles: List[str]) -> Dict:
+        """
+        渲染所有组合
+        
+        参数:
+            themes: 主题列表
+            device_modes: 设备模式列表
+            bg_styles: 背景样式列表
+        
+        返回:
+            包含环境信息、各组合结果和汇总的字典
+        """
+        results = []
+        total_start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="image_word_bench_") as output_folder:
+            for theme in themes:
+                for device_mode in device_modes:
+                    for bg_style in bg_styles:
+                        result = self.run_combination(theme, device_mode, bg_style, output_folder)
+                        results.append(result)
+                        print(f"{theme:<9} {device_mode:<8} {bg_style:<10} "
+                              f"{result['cards_per_sec']:>8.2f} 张/秒  "
+                              f"p50 {result['latency_ms']['p50']:>8.1f}ms  "
+                              f"p95 {result['latency_ms']['p95']:>8.1f}ms  "
+                              f"encode p50 {result['stages_ms']['encode']['p50']:>7.1f}ms  "
+                              f"{result['output_kb']['mean'] or 0:>8.1f}KB/张")
+        total_wall = time.perf_counter() - total_start
+        total_cards = sum(result["cards"] for result in results)
+        
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pillow": PIL.__version__,
+                "numpy": np.__version__,
+                "images_folder": self.images_folder,
+                "word_list_file": self.word_list_file,
+                "cards_per_combination": self.cards,
+                "bg_cache_bytes": self.bg_cache_bytes,
+                "encoder": self.encoder.settings()
+            },
+            "results": results,
+            "summary": {
+                "cards": total_cards,
+                "wall_seconds": round(total_wall, 4),
+                "cards_per_sec": round(total_cards / total_wall, 3) if total_wall > 0 else None,
+                # 峰值内存是整个进程的历史最大值，只能反映全部组合中最大的一个，因此只在汇总中给出
+                "peak_rss_mb": peak_rss_mb()
+            }
+        }
+
+
+def compare_blur_backends(images_folder: str, device_mode: str, radii: List[float],
+                          qualities: List[float], repeats: int = 3) -> Dict:
+    """
+    比较各种背景模糊方式的速度和效果，以PIL高斯模糊的结果为参考
+    
+    参数:
+        images_folder: 背景图片文件夹路径
+        device_mode: 设备模式，决定模糊时的图片尺寸
+        radii: 模糊半径列表
+        qualities: 快速模糊的质量列表
+        repeats: 每张图片重复模糊的次数
+    
+    返回:
+        包含环境信息和各 (模糊方式, 质量, 半径) 组合结果的字典
+    """
+    # 只需要在内存中模糊背景，输出目录用完即删
+    with tempfile.TemporaryDirectory(prefix="image_word_bench_") as output_folder:
+        with redirect_stdout(io.StringIO()):
+            generator = ImageWordGenerator(images_folder=images_folder, output_folder=output_folder,
+                                           device_mode=device_mode, draft_decode=False, bg_cache_bytes=0)
+        # _load_source 已经按设备模式缩放
+        backgrounds = [generator._load_source(os.path.abspath(path), os.path.getmtime(path))
+                       for path in generator.image_files]
+    
+    results = []
+    for radius in radii:
+        generator.blur_backend = "gaussian"
+        references = [np.asarray(generator.blur(img, radius)) for img in backgrounds]
+        
+        for backend in BLUR_BACKENDS:
+            for quality in ([1.0] if backend == "gaussian" else qualities):
+                generator.blur_backend = backend
+                generator.blur_quality = quality
+                times, psnrs, ssims = [], [], []
+                for img, reference in zip(backgrounds, references):
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        blurred = generator.blur(img, radius)
+                        times.append(time.perf_counter() - start)
+                    blurred = np.asarray(blurred)
+                    psnrs.append(psnr(reference, blurred))
+                    ssims.append(ssim(reference, blurred))
+                
+                worst_psnr = min(psnrs)
+                result = {
+                    "backend": backend,
+                    "quality": quality,
+                    "radius": radius,
+                    "images_per_sec": round(len(times) / sum(times), 2),
+                    "p50_ms": round(percentile(times, 50) * 1000, 3),
+                    "psnr_db": round(worst_psnr, 2) if np.isfinite(worst_psnr) else None,
+                    "ssim": round(min(ssims), 5)
+                }
+                results.append(result)
+                print(f"半径 {radius:<4} {backend:<9} 质量 {quality:<5} {result['images_per_sec']:>8.1f} 张/秒  "
+                      f"p50 {result['p50_ms']:>7.1f}ms  PSNR {worst_psnr:>6.2f}dB  SSIM {result['ssim']:.4f}")
+    
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "opencv": cv2.__version__,
+            "images_folder": images_folder,
+            "device_mode": device_mode,
+            "size": list(backgrounds[0].size) if backgrounds else None
+        },
+        # PSNR/SSIM 取所有图片中最差的值，与参考完全相同时PSNR为null
+        "blur": results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict) -> None:
+    """
+    与基线结果对比，打印每个组合的吞吐量变化
+    
+    参数:
+        current: 本次测试结果
+        baseline: 基线测试结果
+    """
+    baseline_by_key = {
+        (result["theme"], result["device_mode"], result["bg_style"]): result
+        for result in baseline.get("results", [])
+    }
+    print(f"\n与基线 {baseline.get('meta', {}).get('git_revision')} 对比 (吞吐量倍数，>1表示更快):")
+    for result in current["results"]:
+        key = (result["theme"], result["device_mode"], result["bg_style"])
+        old = baseline_by_key.get(key)
+        if not old or not old.get("cards_per_sec") or not result.get("cards_per_sec"):
+            continue
+        ratio = result["cards_per_sec"] / old["cards_per_sec"]
+        print(f"{key[0]:<9} {key[1]:<8} {key[2]:<10} {old['cards_per_sec']:>8.2f} -> {result['cards_per_sec']:>8.2f} 张/秒  x{ratio:.2f}")
+
+
+def main():
+    """主函数"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="图片单词生成器基准测试 - 统计各主题、设备模式和背景样式下的渲染性能")
+    parser.add_argument("--images", default=os.path.join(base_dir, "images"), help="背景图片文件夹路径，默认为自带的images文件夹")
+    parser.add_argument("--words", default=os.path.join(base_dir, "example_words.txt"), help="单词列表文件路径，默认为example_words.txt")
+    parser.add_argument("--cards", type=int, default=10, help="每个组合渲染的卡片数量，默认为10")
+    parser.add_argument("--themes", nargs="+", default=THEMES, choices=THEMES, help="要测试的主题，默认为全部")
+    parser.add_argument("--devices", nargs="+", default=DEVICE_MODES, choices=DEVICE_MODES, help="要测试的设备模式，默认为全部")
+    parser.add_argument("--bg-styles", nargs="+", default=BG_STYLES, choices=BG_STYLES, help="要测试的背景样式，默认为全部")
+    parser.add_argument("--bg-cache-mb", type=int, default=256, help="预处理背景缓存的内存上限(MB)，默认为256，为0时不缓存")
+    parser.add_argument("--format", default="jpeg", choices=list(ImageEncoder.EXTENSIONS), help="输出格式，默认为jpeg")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG/WebP 的质量(1-100)，默认为95")
+    parser.add_argument("--jpeg-optimize", action="store_true", help="JPEG 计算最优哈夫曼表")
+    parser.add_argument("--jpeg-progressive", action="store_true", help="JPEG 使用渐进式编码")
+    parser.add_argument("--jpeg-subsampling", choices=["4:4:4", "4:2:2", "4:2:0"], help="JPEG 色度抽样")
+    parser.add_argument("--png-compress-level", type=int, default=6, choices=range(10), metavar="0-9", help="PNG 压缩级别，默认为6")
+    parser.add_argument("--webp-method", type=int, default=4, choices=range(7), metavar="0-6", help="WebP 压缩速度，默认为4")
+    parser.add_argument("--blur-compare", action="store_true",
+                        help="只比较各种背景模糊方式的速度和与PIL高斯模糊的差异(PSNR/SSIM)，不渲染卡片")
+    parser.add_argument("--blur-device", default="mobile", choices=DEVICE_MODES, help="比较模糊方式时的设备模式（决定图片尺寸），默认为mobile")
+    parser.add_argument("--blur-radii", nargs="+", type=float, default=[3, 5, 8, 10], help="比较模糊方式时的模糊半径，默认为各主题使用的3 5 8 10")
+    parser.add_argument("--blur-qualities", nargs="+", type=float, default=[0.25, 0.5, 1.0], help="比较模糊方式时的质量参数，默认为0.25 0.5 1.0")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件路径，默认为bench_results.json")
+    parser.add_argument("--baseline", help="用于对比的基线结果JSON文件")
+    
+    args = parser.parse_args()
+    
+    if args.blur_compare:
+        results = compare_blur_backends(args.images, args.blur_device,
+                                        args.blur_radii, args.blur_qualities)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+        return 0
+    
+    benchmark = RendererBenchmark(
+        images_folder=args.images,
+        word_list_file=args.words,
+        cards=args.cards,
+        bg_cache_bytes=args.bg_cache_mb * 1024 * 1024,
+        encoder=ImageEncoder(
+            format=args.format,
+            quality=args.quality,
+            optimize=args.jpeg_optimize,
+            progressive=args.jpeg_progressive,
+            subsampling=args.jpeg_subsampling,
+            compress_level=args.png_compress_level,
+            webp_method=args.webp_method
+        )
+    )
+    results = benchmark.run(args.themes, args.devices, args.bg_styles)
+    
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    summary = results["summary"]
+    print(f"\n共渲染 {summary['cards']} 张卡片，{summary['cards_per_sec']} 张/秒，峰值内存 {summary['peak_rss_mb']} MB")
+    print(f"结果已保存到 {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare_results(results, json.load(f))
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
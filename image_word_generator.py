@@ -9,15 +9,383 @@
 import os
 import sys
 import argparse
+import copy
+import csv
+import hashlib
+import itertools
+import json
+import math
 import platform
+import queue
 import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Union
+from typing import List, Tuple, Dict, Optional, Union, Iterable, Iterator, Callable
 
 # 第三方库
 import cv2
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance, ImageOps
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
+
+class BuildManifest:
+    """
+    生成记录，保存在输出目录中的SQLite数据库里
+    
+    记录每张已生成图片的文件名和内容哈希，用于增量/断点续传渲染
+    """
+    
+    # 哈希格式版本，渲染逻辑发生不兼容变化时递增，使旧记录全部失效
+    VERSION = 2
+    FILENAME = ".build_manifest.sqlite3"
+    
+    def __init__(self, output_folder: str, commit_interval: int = 100):
+        """
+        打开（或创建）输出目录中的生成记录
+        
+        参数:
+            output_folder: 输出图片文件夹路径
+            commit_interval: 每记录多少张图片提交一次，程序中断时最多只需重新渲染这么多张
+        """
+        self.path = os.path.join(output_folder, self.FILENAME)
+        self.commit_interval = commit_interval
+        self._uncommitted = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cards (output_name TEXT PRIMARY KEY, card_hash TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get(self, output_name: str) -> Optional[str]:
+        """
+        查询图片的内容哈希
+        
+        参数:
+            output_name: 输出图片文件名
+            
+        返回:
+            记录的内容哈希，没有记录时返回None
+        """
+        row = self._conn.execute("SELECT card_hash FROM cards WHERE output_name = ?", (output_name,)).fetchone()
+        return row[0] if row else None
+    
+    def record(self, output_name: str, card_hash: str) -> None:
+        """
+        记录已成功生成的图片
+        
+        参数:
+            output_name: 输出图片文件名
+            card_hash: 内容哈希
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cards (output_name, card_hash) VALUES (?, ?)", (output_name, card_hash)
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self._conn.commit()
+            self._uncommitted = 0
+    
+    def get_setting(self, name: str) -> Optional[str]:
+        """
+        查询上次运行保存的设置
+        
+        参数:
+            name: 设置名称
+            
+        返回:
+            设置的值，没有记录时返回None
+        """
+        row = self._conn.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+    
+    def set_setting(self, name: str, value: str) -> None:
+        """
+        保存设置并立即提交，供下次运行读取
+        
+        参数:
+            name: 设置名称
+            value: 设置的值
+        """
+        self._conn.execute("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, value))
+        self._conn.commit()
+    
+    def close(self) -> None:
+        """提交未保存的记录并关闭数据库"""
+        self._conn.commit()
+        self._conn.close()
+
+
+@dataclass(frozen=True)
+class CardLayout:
+    """
+    单词卡片排版结果
+    
+    只取决于文本、画布尺寸和字体设置，可以在不同背景和背景样式之间复用
+    """
+    font_en: ImageFont.FreeTypeFont
+    font_phonetic: ImageFont.FreeTypeFont
+    font_cn: ImageFont.FreeTypeFont
+    # 各行文本左上角坐标 (x, y)，没有音标时音标坐标为 (0, 0)
+    en_text_pos: Tuple[int, int]
+    phonetic_text_pos: Tuple[int, int]
+    cn_text_pos: Tuple[int, int]
+    # 背景面板坐标 (x1, y1, x2, y2)
+    panel_xy: Tuple[int, int, int, int]
+    # 装饰分隔线上下两行文本的Y坐标，分隔线画在两者中间
+    divider_y: Tuple[int, int]
+
+
+class StageTimer:
+    """
+    渲染阶段耗时统计
+    
+    按阶段累计耗时直方图，可导出为JSON或Prometheus文本格式
+    """
+    
+    # 直方图桶的上界（秒）
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        初始化阶段耗时统计
+        
+        参数:
+            buckets: 直方图桶的上界（秒），按升序排列
+        """
+        self.buckets = tuple(buckets)
+        self.cards = 0
+        # 输出文件的总字节数
+        self.output_bytes = 0
+        # 阶段名称 -> {"counts": 每个桶的计数（最后一个为+Inf）, "sum": 总耗时, "count": 次数}
+        self.stages = OrderedDict()
+    
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        记录一次阶段耗时
+        
+        参数:
+            stage: 阶段名称
+            seconds: 耗时（秒）
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            self.stages[stage] = histogram
+        
+        position = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                position = i
+                break
+        histogram["counts"][position] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+    
+    def record_card(self, timings: Dict[str, float], output_bytes: int = 0) -> None:
+        """
+        记录一张卡片各阶段的耗时
+        
+        参数:
+            timings: 阶段名称 -> 耗时（秒）
+            output_bytes: 这张卡片输出文件的字节数
+        """
+        self.cards += 1
+        self.output_bytes += output_bytes
+        for stage, seconds in timings.items():
+            self.record(stage, seconds)
+    
+    def to_dict(self) -> Dict:
+        """
+        导出为字典，直方图桶的计数为累计值
+        
+        返回:
+            包含卡片数量和各阶段直方图的字典
+        """
+        stages = {}
+        for stage, histogram in self.stages.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(self.buckets) + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            stages[stage] = {
+                "count": histogram["count"],
+                "sum_seconds": round(histogram["sum"], 6),
+                "mean_ms": round(histogram["sum"] / histogram["count"] * 1000, 3) if histogram["count"] else 0.0,
+                "buckets": buckets
+            }
+        return {"cards": self.cards, "output_bytes": self.output_bytes, "stages": stages}
+    
+    def to_prometheus(self, metric: str = "image_word_stage_duration_seconds") -> str:
+        """
+        导出为Prometheus文本格式
+        
+        参数:
+            metric: 指标名称
+            
+        返回:
+            Prometheus文本格式的直方图
+        """
+        lines = [
+            f"# HELP {metric} Duration of each card rendering stage in seconds.",
+            f"# TYPE {metric} histogram"
+        ]
+        for stage, data in self.to_dict()["stages"].items():
+            for bound, count in data["buckets"].items():
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {data["sum_seconds"]}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {data["count"]}')
+        lines.append("# HELP image_word_cards_total Number of rendered cards.")
+        lines.append("# TYPE image_word_cards_total counter")
+        lines.append(f"image_word_cards_total {self.cards}")
+        lines.append("# HELP image_word_output_bytes_total Number of bytes written to output files.")
+        lines.append("# TYPE image_word_output_bytes_total counter")
+        lines.append(f"image_word_output_bytes_total {self.output_bytes}")
+        return "\n".join(lines) + "\n"
+    
+    def save(self, path: str) -> None:
+        """
+        保存统计结果，.json 文件保存为JSON，其他扩展名保存为Prometheus文本格式
+        
+        参数:
+            path: 输出文件路径
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.lower().endswith(".json"):
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(self.to_prometheus())
+    
+    def summary(self) -> str:
+        """
+        生成各阶段平均耗时的简要文本
+        
+        返回:
+            每行一个阶段的摘要文本
+        """
+        lines = []
+        for stage, data in self.to_dict()["stages"].items():
+            lines.append(f"  {stage:<10} 次数 {data['count']:>7}  平均 {data['mean_ms']:>9.2f}ms  合计 {data['sum_seconds']:>9.2f}s")
+        if self.cards and self.output_bytes:
+            lines.append(f"  {'输出':<10} 合计 {self.output_bytes / (1024 * 1024):.2f}MB  平均每张 {self.output_bytes / self.cards / 1024:.1f}KB")
+        return "\n".join(lines)
+
+
+class ImageEncoder:
+    """
+    输出图片编码器
+    
+    支持 JPEG（质量、优化、渐进式、色度抽样）、WebP（质量、压缩速度、无损）、PNG（压缩级别）
+    和原始RGB数据（供下游视频合成直接读取，尺寸即设备模式的分辨率）
+    """
+    
+    # 输出格式 -> 文件扩展名
+    EXTENSIONS = {
+        "jpeg": ".jpg",
+        "webp": ".webp",
+        "png": ".png",
+        "raw": ".rgb"
+    }
+    
+    def __init__(self,
+                 format: str = "jpeg",
+                 quality: int = 95,
+                 optimize: bool = False,
+                 progressive: bool = False,
+                 subsampling: Optional[str] = None,
+                 compress_level: int = 6,
+                 webp_method: int = 4,
+                 lossless: bool = False):
+        """
+        初始化编码器
+        
+        参数:
+            format: 输出格式，可选 "jpeg", "webp", "png", "raw"
+            quality: JPEG/WebP 的质量，1-100
+            optimize: JPEG 是否计算最优哈夫曼表（文件更小，编码更慢）
+            progressive: JPEG 是否使用渐进式编码
+            subsampling: JPEG 色度抽样，可选 "4:4:4", "4:2:2", "4:2:0"，不指定则使用Pillow的默认值
+            compress_level: PNG 压缩级别，0（不压缩，最快）- 9（最小）
+            webp_method: WebP 压缩速度，0（最快）- 6（最小）
+            lossless: WebP 是否使用无损压缩
+        """
+        if format not in self.EXTENSIONS:
+            raise ValueError(f"不支持的输出格式: {format}")
+        self.format = format
+        self.quality = quality
+        self.optimize = optimize
+        self.progressive = progressive
+        self.subsampling = subsampling
+        self.compress_level = compress_level
+        self.webp_method = webp_method
+        self.lossless = lossless
+    
+    @property
+    def extension(self) -> str:
+        """输出文件扩展名"""
+        return self.EXTENSIONS[self.format]
+    
+    def settings(self) -> Dict:
+        """
+        获取影响输出内容的编码设置，用于计算卡片哈希和打印
+        
+        返回:
+            编码设置字典
+        """
+        if self.format == "jpeg":
+            return {"format": "jpeg", "quality": self.quality, "optimize": self.optimize,
+                    "progressive": self.progressive, "subsampling": self.subsampling}
+        if self.format == "webp":
+            return {"format": "webp", "quality": self.quality, "method": self.webp_method, "lossless": self.lossless}
+        if self.format == "png":
+            return {"format": "png", "compress_level": self.compress_level}
+        return {"format": "raw"}
+    
+    def encode(self, img: Image, output_path: str) -> int:
+        """
+        将图片编码并写入文件
+        
+        除原始RGB数据外，文件格式由输出路径的扩展名决定（与 extension 一致时使用本编码器的设置）
+        
+        参数:
+            img: 要保存的图片（RGBA或RGB）
+            output_path: 输出文件路径
+            
+        返回:
+            写入的字节数
+        """
+        img = img.convert("RGB")
+        
+        if self.format == "raw":
+            data = img.tobytes()
+            with open(output_path, "wb") as f:
+                f.write(data)
+            return len(data)
+        
+        if self.format == "jpeg":
+            options = {"quality": self.quality}
+            if self.optimize:
+                options["optimize"] = True
+            if self.progressive:
+                options["progressive"] = True
+            if self.subsampling is not None:
+                options["subsampling"] = self.subsampling
+        elif self.format == "webp":
+            options = {"quality": self.quality, "method": self.webp_method, "lossless": self.lossless}
+        else:
+            options = {"compress_level": self.compress_level}
+        img.save(output_path, **options)
+        return os.path.getsize(output_path)
+
 
 class ImageWordGenerator:
     """图片单词生成器主类"""
@@ -32,7 +400,17 @@ class ImageWordGenerator:
                  font_path_cn: str = None,
                  theme: str = "standard",
                  device_mode: str = "mobile",
-                 bg_style: str = "rectangle"):  # 新增背景样式参数
+                 bg_style: str = "rectangle",  # 新增背景样式参数
+                 font_cache_size: int = 128,
+                 panel_quantum: int = 8,
+                 bg_cache_bytes: int = 256 * 1024 * 1024,
+                 bg_assignment: str = "shuffle",
+                 seed: Optional[int] = None,
+                 variants: Optional[Iterable[Tuple[str, str, str]]] = None,
+                 encoder: Optional[ImageEncoder] = None,
+                 draft_decode: bool = True,
+                 blur_backend: str = "gaussian",
+                 blur_quality: float = 0.5):
         """
         初始化图片单词生成器
         
@@ -47,6 +425,17 @@ class ImageWordGenerator:
             theme: 主题风格，可选 "standard"(标准), "focus"(专注), "elegant"(优雅), "dark"(暗黑), "minimal"(极简)
             device_mode: 设备模式，可选 "auto"(自动), "mobile"(手机), "tablet"(平板), "desktop"(桌面)
             bg_style: 背景样式，可选 "rectangle"(矩形), "wave"(海浪形状)
+            font_cache_size: 字体对象缓存的最大数量（LRU淘汰）
+            panel_quantum: 背景面板尺寸的取整粒度（像素），相近尺寸的面板共用同一个预渲染图层，为1时不取整
+            bg_cache_bytes: 预处理背景缓存的内存上限（字节），为0时不缓存
+            bg_assignment: 背景分配策略，可选 "shuffle"(每轮随机打乱), "round-robin"(按顺序轮流), "hash"(按单词哈希)
+            seed: 背景分配的随机种子，不指定则沿用输出目录中上次运行保存的种子，没有记录时随机生成
+            variants: 多变体模式下的 (主题, 设备模式, 背景样式) 列表，每个单词一次性生成所有变体，
+                      分别输出到 output_folder 下的 "主题_设备模式_背景样式" 子文件夹；不指定则只生成一种
+            encoder: 输出图片编码器，不指定则保存为质量95的JPEG
+            draft_decode: 是否对JPEG背景使用缩小解码（DCT缩放），直接解码到不小于设备分辨率的最小尺寸
+            blur_backend: 背景模糊的实现，可选 "gaussian"(PIL高斯模糊), "downscale"(缩小后模糊再放大), "box"(OpenCV多次盒式模糊近似)
+            blur_quality: 快速模糊的质量，0-1，越小越快: downscale 下为缩小比例，box 下决定盒式模糊的次数(1-3)
         """
         self.images_folder = images_folder
         self.output_folder = output_folder
@@ -58,6 +447,15 @@ class ImageWordGenerator:
         self.theme = theme
         self.device_mode = device_mode
         self.bg_style = bg_style
+        self.bg_assignment = bg_assignment
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self._seed_given = seed is not None
+        self.encoder = encoder if encoder is not None else ImageEncoder()
+        self.draft_decode = draft_decode
+        if blur_backend not in ("gaussian", "downscale", "box"):
+            raise ValueError(f"不支持的模糊方式: {blur_backend}")
+        self.blur_backend = blur_backend
+        self.blur_quality = min(max(blur_quality, 0.01), 1.0)
         
         # 设备模式配置
         self.device_configs = {
@@ -93,7 +491,8 @@ class ImageWordGenerator:
         # 获取设备配置
         self.device_config = self.device_configs.get(device_mode, self.device_configs["auto"])
         
-        # 根据设备模式调整字体大小
+        # 根据设备模式调整字体大小，保留原始字号供多变体模式按各自的设备模式重新计算
+        self._base_font_sizes = (self.font_size_en, self.font_size_cn, self.font_size_phonetic)
         if device_mode != "auto" and "font_size_multiplier" in self.device_config:
             self.font_size_en = int(self.font_size_en * self.device_config["font_size_multiplier"])
             self.font_size_cn = int(self.font_size_cn * self.device_config["font_size_multiplier"])
@@ -169,24 +568,263 @@ class ImageWordGenerator:
         # 创建输出目录
         os.makedirs(output_folder, exist_ok=True)
         
-        # 获取图片文件列表
+        # 获取图片文件列表，排序后保证不同运行、不同文件系统下的顺序一致
         self.image_files = []
         for ext in ['jpg', 'jpeg', 'png', 'gif']:
             self.image_files.extend(list(Path(images_folder).glob(f"*.{ext}")))
+        self.image_files.sort()
+        
+        # 当前轮次的背景排列缓存 (轮次, 排列)，用于 shuffle 分配策略
+        self._bg_cycle_order = (None, None)
         
         if not self.image_files:
             print(f"警告: 在 {images_folder} 中没有找到图片文件")
         else:
             print(f"找到 {len(self.image_files)} 张背景图片")
             
+        # 字体缓存: (字体路径, 字号, 字体类型) -> 字体对象
+        self.font_cache_size = font_cache_size
+        self._font_cache = OrderedDict()
+        self._font_cache_hits = 0
+        self._font_cache_misses = 0
+        # 每种字体类型解析出的字体文件路径，None表示使用默认字体
+        self._resolved_font_paths = {}
+        
+        # 背景缓存: (图片路径, 修改时间, 设备模式, 主题) -> 缩放/模糊/调亮度后的背景
+        self.bg_cache_bytes = bg_cache_bytes
+        self._bg_cache = OrderedDict()
+        self._bg_cache_used_bytes = 0
+        self._bg_cache_hits = 0
+        self._bg_cache_misses = 0
+        
+        # 渲染阶段观察者: observer(阶段名称, 耗时秒数)，为None时不计时
+        self.stage_observer: Optional[Callable[[str, float], None]] = None
+        # 批量处理时的阶段耗时统计，为None时不统计
+        self.stage_timer: Optional[StageTimer] = None
+        
+        # 排版缓存: (文本, 画布尺寸, 字体设置) -> CardLayout
+        self.layout_cache_size = 1024
+        self._layout_cache = OrderedDict()
+        
+        # 预渲染背景面板缓存: (主题, 背景样式, 宽度, 高度, 颜色) -> (面板图层, 上边距)
+        self.panel_quantum = panel_quantum
+        self.sprite_cache_size = 64
+        self._sprite_cache = OrderedDict()
+        
+        # 解码/缩放后的原图缓存: (图片路径, 修改时间, 设备模式) -> 图片，设备模式为None表示只解码未缩放
+        # 只在多变体模式下启用，使同一张背景在所有变体之间只解码一次、每种设备模式只缩放一次
+        self.source_cache_size = 0
+        self._source_cache = OrderedDict()
+        # 共用解码结果的设备模式，缩小解码时要满足其中最大的分辨率
+        self._source_device_modes = (device_mode,)
+        
+        # 圆角蒙版缓存: (宽度, 高度, 圆角半径) -> 蒙版
+        self.mask_cache_size = 32
+        self._mask_cache = OrderedDict()
+        
+        # 文本栅格化缓存: (文本, 字体文件, 字号, 字体序号) -> (alpha蒙版, 相对绘制位置的偏移)
+        self.glyph_cache_size = 512
+        self._glyph_cache = OrderedDict()
+        self._glyph_cache_hits = 0
+        self._glyph_cache_misses = 0
+        
         # 加载字体
         self.font_en = self._load_font(font_path_en, self.font_size_en, "en")
         self.font_cn = self._load_font(font_path_cn, self.font_size_cn, "cn")
+        
+        # 多变体模式: 每个变体是一个共享解码、排版、字体和面板缓存的生成器
+        self.variants: List["ImageWordGenerator"] = []
+        if variants:
+            variants = list(dict.fromkeys(tuple(variant) for variant in variants))
+            self._source_device_modes = tuple(dict.fromkeys(device for _, device, _ in variants))
+            self.source_cache_size = 1 + len(self._source_device_modes)
+            self.variants = [self._make_variant(*variant, bg_cache_bytes=bg_cache_bytes // len(variants))
+                             for variant in variants]
+    
+    # 多进程渲染时进程池允许重建的次数，工作进程反复异常退出时不再继续
+    MAX_POOL_RESTARTS = 3
+    
+    # 多变体模式下各变体之间共享的缓存，缓存键中已包含主题/设备模式/背景样式等区分信息
+    _SHARED_CACHES = ("_font_cache", "_resolved_font_paths", "_source_cache", "_layout_cache",
+                      "_sprite_cache", "_mask_cache", "_glyph_cache")
+    
+    def __getstate__(self) -> Dict:
+        """
+        序列化时去掉字体对象，供多进程渲染时传递给子进程
+        
+        返回:
+            可被pickle的实例状态
+        """
+        state = self.__dict__.copy()
+        state.pop("font_en", None)
+        state.pop("font_cn", None)
+        state["_font_cache"] = OrderedDict()
+        state["_font_cache_hits"] = 0
+        state["_font_cache_misses"] = 0
+        state["_bg_cache"] = OrderedDict()
+        state["_bg_cache_used_bytes"] = 0
+        state["_bg_cache_hits"] = 0
+        state["_bg_cache_misses"] = 0
+        state["_mask_cache"] = OrderedDict()
+        state["_source_cache"] = OrderedDict()
+        state["_glyph_cache"] = OrderedDict()
+        state["_glyph_cache_hits"] = 0
+        state["_glyph_cache_misses"] = 0
+        state["_layout_cache"] = OrderedDict()
+        state["_sprite_cache"] = OrderedDict()
+        state["stage_observer"] = None
+        return state
+    
+    def __setstate__(self, state: Dict) -> None:
+        """
+        反序列化时在子进程中重新加载字体
+        
+        参数:
+            state: __getstate__ 返回的实例状态
+        """
+        self.__dict__.update(state)
+        self.font_en = self._load_font(self.font_path_en, self.font_size_en, "en")
+        self.font_cn = self._load_font(self.font_path_cn, self.font_size_cn, "cn")
+        # 子进程中的变体重新共享缓存
+        for variant in self.variants:
+            self._share_caches(variant)
+    
+    def _share_caches(self, variant: "ImageWordGenerator") -> None:
+        """
+        让变体与当前生成器共用缓存
+        
+        参数:
+            variant: 变体生成器
+        """
+        for name in self._SHARED_CACHES:
+            setattr(variant, name, getattr(self, name))
+    
+    def _make_variant(self, theme: str, device_mode: str, bg_style: str, bg_cache_bytes: int) -> "ImageWordGenerator":
+        """
+        创建一个变体生成器，除主题、设备模式和背景样式外沿用当前生成器的设置
+        
+        参数:
+            theme: 主题风格
+            device_mode: 设备模式
+            bg_style: 背景样式
+            bg_cache_bytes: 该变体预处理背景缓存的内存上限（字节）
+            
+        返回:
+            变体生成器，输出到 output_folder 下的 "主题_设备模式_背景样式" 子文件夹
+        """
+        # 通过 __getstate__ 复制，得到空的缓存，随后改为共享当前生成器的缓存
+        variant = copy.copy(self)
+        variant.variants = []
+        variant.output_folder = os.path.join(self.output_folder, f"{theme}_{device_mode}_{bg_style}")
+        os.makedirs(variant.output_folder, exist_ok=True)
+        
+        variant.theme = theme
+        variant.config = self.theme_configs.get(theme, self.theme_configs["standard"])
+        variant.bg_style = bg_style
+        variant.device_mode = device_mode
+        variant.device_config = self.device_configs.get(device_mode, self.device_configs["auto"])
+        variant.font_size_en, variant.font_size_cn, variant.font_size_phonetic = self._base_font_sizes
+        if device_mode != "auto" and "font_size_multiplier" in variant.device_config:
+            multiplier = variant.device_config["font_size_multiplier"]
+            variant.font_size_en = int(variant.font_size_en * multiplier)
+            variant.font_size_cn = int(variant.font_size_cn * multiplier)
+            variant.font_size_phonetic = int(variant.font_size_phonetic * multiplier)
+        variant.bg_cache_bytes = bg_cache_bytes
+        
+        self._share_caches(variant)
+        variant.font_en = variant._load_font(variant.font_path_en, variant.font_size_en, "en")
+        variant.font_cn = variant._load_font(variant.font_path_cn, variant.font_size_cn, "cn")
+        return variant
+    
+    def _resolve_font_path(self, font_path: str, font_type: str) -> Optional[str]:
+        """
+        解析字体文件路径，根据操作系统和字体类型选择合适的字体
+        
+        每种 (字体路径, 字体类型) 只解析一次，结果会被缓存
+        
+        参数:
+            font_path: 字体文件路径
+            font_type: 字体类型，'en'为英文，'cn'为中文，'phonetic'为音标
+            
+        返回:
+            可用的字体文件路径，找不到时返回None
+        """
+        key = (font_path, font_type)
+        if key in self._resolved_font_paths:
+            return self._resolved_font_paths[key]
+        
+        # 如果指定了字体路径，优先使用
+        if font_path and os.path.exists(font_path):
+            self._resolved_font_paths[key] = font_path
+            return font_path
+        
+        # 否则根据操作系统选择默认字体
+        system = platform.system()
+        
+        if system == "Windows":
+            # Windows系统字体
+            if font_type == "phonetic":
+                # Windows下支持音标的字体
+                font_paths = [
+                    "arial.ttf", "Arial Unicode MS", "segoeui.ttf", 
+                    "C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialuni.ttf", 
+                    "C:/Windows/Fonts/segoeui.ttf", "C:/Windows/Fonts/seguisym.ttf",
+                    "C:/Windows/Fonts/calibri.ttf", "C:/Windows/Fonts/cambria.ttc"
+                ]
+            elif font_type == "en":
+                font_paths = ["arial.ttf", "calibri.ttf", "C:/Windows/Fonts/arial.ttf"]
+            else:  # cn
+                font_paths = ["simhei.ttf", "simsun.ttc", "C:/Windows/Fonts/simhei.ttf", "C:/Windows/Fonts/simsun.ttc"]
+        elif system == "Darwin":  # macOS
+            # macOS系统字体
+            if font_type == "phonetic" or font_type == "en":
+                # macOS下支持音标的字体
+                font_paths = [
+                    "/System/Library/Fonts/Helvetica.ttc", 
+                    "/Library/Fonts/Arial Unicode.ttf",
+                    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+                    "/System/Library/Fonts/STHeiti Light.ttc",
+                    "/System/Library/Fonts/Supplemental/Courier New.ttf",
+                    "/Library/Fonts/Arial.ttf"
+                ]
+            else:  # cn
+                font_paths = ["/System/Library/Fonts/PingFang.ttc", "/Library/Fonts/Arial Unicode.ttf"]
+        else:  # Linux或其他
+            # Linux系统字体
+            if font_type == "phonetic" or font_type == "en":
+                # Linux下支持音标的字体
+                font_paths = [
+                    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+                    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+                    "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
+                    "/usr/share/fonts/TTF/Arial.ttf"
+                ]
+            else:  # cn
+                font_paths = ["/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
+        
+        # 选择第一个可以正常加载的系统字体
+        resolved = None
+        for path in font_paths:
+            try:
+                if os.path.exists(path):
+                    ImageFont.truetype(path, 10)
+                    resolved = path
+                    break
+            except Exception:
+                continue
+        
+        if resolved is None:
+            print(f"警告: 无法加载{font_type}字体，使用默认字体")
+        
+        self._resolved_font_paths[key] = resolved
+        return resolved
     
     def _load_font(self, font_path: str, font_size: int, font_type: str) -> ImageFont:
         """
         加载字体，根据操作系统和字体类型选择合适的字体
         
+        已加载的字体对象按 (字体路径, 字号, 字体类型) 缓存在LRU中，避免重复解析字体文件
+        
         参数:
             font_path: 字体文件路径
             font_size: 字体大小
@@ -196,70 +834,45 @@ class ImageWordGenerator:
             PIL字体对象
         """
         try:
-            # 如果指定了字体路径，尝试加载
-            if font_path and os.path.exists(font_path):
-                return ImageFont.truetype(font_path, font_size)
-            
-            # 否则根据操作系统选择默认字体
-            system = platform.system()
-            
-            if system == "Windows":
-                # Windows系统字体
-                if font_type == "phonetic":
-                    # Windows下支持音标的字体
-                    font_paths = [
-                        "arial.ttf", "Arial Unicode MS", "segoeui.ttf", 
-                        "C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialuni.ttf", 
-                        "C:/Windows/Fonts/segoeui.ttf", "C:/Windows/Fonts/seguisym.ttf",
-                        "C:/Windows/Fonts/calibri.ttf", "C:/Windows/Fonts/cambria.ttc"
-                    ]
-                elif font_type == "en":
-                    font_paths = ["arial.ttf", "calibri.ttf", "C:/Windows/Fonts/arial.ttf"]
-                else:  # cn
-                    font_paths = ["simhei.ttf", "simsun.ttc", "C:/Windows/Fonts/simhei.ttf", "C:/Windows/Fonts/simsun.ttc"]
-            elif system == "Darwin":  # macOS
-                # macOS系统字体
-                if font_type == "phonetic" or font_type == "en":
-                    # macOS下支持音标的字体
-                    font_paths = [
-                        "/System/Library/Fonts/Helvetica.ttc", 
-                        "/Library/Fonts/Arial Unicode.ttf",
-                        "/System/Library/Fonts/AppleSDGothicNeo.ttc",
-                        "/System/Library/Fonts/STHeiti Light.ttc",
-                        "/System/Library/Fonts/Supplemental/Courier New.ttf",
-                        "/Library/Fonts/Arial.ttf"
-                    ]
-                else:  # cn
-                    font_paths = ["/System/Library/Fonts/PingFang.ttc", "/Library/Fonts/Arial Unicode.ttf"]
-            else:  # Linux或其他
-                # Linux系统字体
-                if font_type == "phonetic" or font_type == "en":
-                    # Linux下支持音标的字体
-                    font_paths = [
-                        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
-                        "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-                        "/usr/share/fonts/TTF/Arial.ttf"
-                    ]
-                else:  # cn
-                    font_paths = ["/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
-            
-            # 尝试加载系统字体
-            for path in font_paths:
-                try:
-                    if os.path.exists(path):
-                        return ImageFont.truetype(path, font_size)
-                except Exception:
-                    continue
+            resolved_path = self._resolve_font_path(font_path, font_type)
+            key = (resolved_path, font_size, font_type)
             
-            # 如果都失败，使用默认字体
-            print(f"警告: 无法加载{font_type}字体，使用默认字体")
-            return ImageFont.load_default()
+            font = self._font_cache.get(key)
+            if font is not None:
+                self._font_cache_hits += 1
+                self._font_cache.move_to_end(key)
+                return font
+            
+            self._font_cache_misses += 1
+            if resolved_path is not None:
+                font = ImageFont.truetype(resolved_path, font_size)
+            else:
+                # 如果都失败，使用默认字体
+                font = ImageFont.load_default()
+            
+            self._font_cache[key] = font
+            if len(self._font_cache) > self.font_cache_size:
+                self._font_cache.popitem(last=False)
+            return font
             
         except Exception as e:
             print(f"加载字体出错: {e}")
             return ImageFont.load_default()
     
+    def get_font_cache_stats(self) -> Dict[str, int]:
+        """
+        获取字体缓存的统计信息
+        
+        返回:
+            包含命中次数(hits)、未命中次数(misses)、当前缓存数量(size)和最大容量(max_size)的字典
+        """
+        return {
+            "hits": self._font_cache_hits,
+            "misses": self._font_cache_misses,
+            "size": len(self._font_cache),
+            "max_size": self.font_cache_size
+        }
+    
     def get_text_size(self, text: str, font: ImageFont) -> Tuple[int, int]:
         """
         获取文本尺寸，兼容不同版本的PIL库
@@ -293,6 +906,40 @@ class ImageWordGenerator:
                     # 如果都失败，返回估计值
                     return len(text) * font.size // 2, font.size
     
+    def _resize_size(self, width: int, height: int, device_mode: str) -> Optional[Tuple[int, int]]:
+        """
+        计算设备模式下原图在裁剪前要缩放到的尺寸
+        
+        参数:
+            width: 原图宽度
+            height: 原图高度
+            device_mode: 设备模式
+            
+        返回:
+            缩放后的尺寸 (宽度, 高度)，保持原始大小时返回None
+        """
+        device_config = self.device_configs.get(device_mode, self.device_configs["auto"])
+        
+        # 如果是自动模式或保持原始大小，不需要缩放
+        if device_mode == "auto" or device_config["keep_original"]:
+            return None
+        
+        # 获取目标尺寸
+        target_width = device_config["target_width"]
+        target_height = device_config["target_height"]
+        target_ratio = device_config["aspect_ratio"]
+        
+        # 直接调整到目标尺寸，不考虑比例
+        if target_ratio is None:
+            return target_width, target_height
+        
+        # 根据目标比例调整尺寸，之后居中裁剪
+        orig_ratio = width / height
+        if orig_ratio > target_ratio:  # 原图更宽，以高度为基准
+            return int(target_height * orig_ratio), target_height
+        # 原图更窄或相等，以宽度为基准
+        return target_width, int(target_width / orig_ratio)
+    
     def resize_for_device(self, img: Image) -> Image:
         """
         根据设备模式调整图片尺寸
@@ -303,133 +950,496 @@ class ImageWordGenerator:
         返回:
             调整后的图片
         """
+        size = self._resize_size(img.width, img.height, self.device_mode)
+        
         # 如果是自动模式或保持原始大小，直接返回
-        if self.device_mode == "auto" or self.device_config["keep_original"]:
+        if size is None:
             return img
         
-        # 获取目标尺寸
         target_width = self.device_config["target_width"]
         target_height = self.device_config["target_height"]
-        target_ratio = self.device_config["aspect_ratio"]
-        
-        # 原始尺寸
-        orig_width, orig_height = img.size
-        orig_ratio = orig_width / orig_height
-        
-        # 创建一个新的画布，使用目标尺寸和比例
-        if target_ratio is not None:
-            # 根据目标比例调整尺寸
-            if orig_ratio > target_ratio:  # 原图更宽
-                # 以高度为基准
-                new_height = target_height
-                new_width = int(new_height * orig_ratio)
-                # 居中裁剪到目标宽度
-                img = img.resize((new_width, new_height), Image.LANCZOS)
-                left = (new_width - target_width) // 2
-                img = img.crop((left, 0, left + target_width, new_height))
-            else:  # 原图更窄或相等
-                # 以宽度为基准
-                new_width = target_width
-                new_height = int(new_width / orig_ratio)
-                # 居中裁剪到目标高度
-                img = img.resize((new_width, new_height), Image.LANCZOS)
-                top = (new_height - target_height) // 2
-                img = img.crop((0, top, new_width, top + target_height))
-        else:
-            # 直接调整到目标尺寸，不考虑比例
-            img = img.resize((target_width, target_height), Image.LANCZOS)
+        new_width, new_height = size
+        img = img.resize(size, Image.LANCZOS)
+        
+        # 居中裁剪到目标尺寸
+        if new_width > target_width:
+            left = (new_width - target_width) // 2
+            img = img.crop((left, 0, left + target_width, new_height))
+        elif new_height > target_height:
+            top = (new_height - target_height) // 2
+            img = img.crop((0, top, new_width, top + target_height))
         
         return img
     
-    def draw_rounded_rectangle(self, draw: ImageDraw, xy: Tuple, radius: int = 20, fill: Tuple = None) -> None:
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
         """
-        绘制圆角矩形
+        记录一个渲染阶段的耗时，并通知阶段观察者
+        
+        未设置 stage_observer 时不做任何计时
         
         参数:
-            draw: ImageDraw对象
-            xy: 坐标 (x1, y1, x2, y2)
-            radius: 圆角半径
-            fill: 填充颜色
+            name: 阶段名称，如 "decode"、"resize"、"blur"、"layout"、"composite"、"text"、"encode"
         """
-        x1, y1, x2, y2 = xy
-        # 绘制主矩形
-        draw.rectangle([(x1+radius, y1), (x2-radius, y2)], fill=fill)
-        draw.rectangle([(x1, y1+radius), (x2, y2-radius)], fill=fill)
-        # 绘制四个角
-        draw.pieslice([(x1, y1), (x1+radius*2, y1+radius*2)], 180, 270, fill=fill)
-        draw.pieslice([(x2-radius*2, y1), (x2, y1+radius*2)], 270, 360, fill=fill)
-        draw.pieslice([(x1, y2-radius*2), (x1+radius*2, y2)], 90, 180, fill=fill)
-        draw.pieslice([(x2-radius*2, y2-radius*2), (x2, y2)], 0, 90, fill=fill)
+        if self.stage_observer is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_observer(name, time.perf_counter() - start)
     
-    def draw_gradient_rectangle(self, img: Image, xy: Tuple, fill_top: Tuple, fill_bottom: Tuple, radius: int = 0) -> None:
+    def _prepare_background(self, image_path: str) -> Image:
         """
-        绘制渐变矩形
+        打开背景图片并完成缩放、模糊和亮度调整
+        
+        处理结果按 (图片路径, 修改时间, 设备模式, 主题) 缓存，超出内存上限时按LRU淘汰
         
         参数:
-            img: Image对象
-            xy: 坐标 (x1, y1, x2, y2)
-            fill_top: 顶部颜色
-            fill_bottom: 底部颜色
-            radius: 圆角半径
+            image_path: 背景图片路径
+            
+        返回:
+            预处理后的RGBA背景图片（副本，可直接在上面绘制）
         """
-        x1, y1, x2, y2 = xy
-        width = x2 - x1
-        height = y2 - y1
+        key = (os.path.abspath(image_path), os.path.getmtime(image_path), self.device_mode, self.theme)
         
-        # 创建渐变图像
-        gradient = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(gradient)
+        img = self._bg_cache.get(key)
+        if img is not None:
+            self._bg_cache_hits += 1
+            self._bg_cache.move_to_end(key)
+            return img.copy()
         
-        for y in range(height):
-            r = int(fill_top[0] + (fill_bottom[0] - fill_top[0]) * y / height)
-            g = int(fill_top[1] + (fill_bottom[1] - fill_top[1]) * y / height)
-            b = int(fill_top[2] + (fill_bottom[2] - fill_top[2]) * y / height)
-            a = int(fill_top[3] + (fill_bottom[3] - fill_top[3]) * y / height)
-            draw.line([(0, y), (width, y)], fill=(r, g, b, a))
+        self._bg_cache_misses += 1
         
-        # 如果需要圆角
-        if radius > 0:
-            mask = Image.new('L', (width, height), 0)
-            mask_draw = ImageDraw.Draw(mask)
-            self.draw_rounded_rectangle(mask_draw, (0, 0, width, height), radius, fill=255)
-            gradient.putalpha(mask)
+        # 打开图片并调整大小以适应设备（多变体模式下复用其他变体的解码和缩放结果）
+        source = self._load_source(key[0], key[1])
+        img = source
         
-        # 粘贴到原图
-        img.paste(gradient, (x1, y1), gradient)
+        # 亮度调整使用只作用于RGB通道的查找表，不需要像 ImageEnhance 那样分配全黑图像再混合
+        brightness_lut = self._brightness_lut(self.config["brightness"]) if self.config["brightness"] != 1.0 else None
+        
+        # 应用模糊效果（根据主题配置），同时完成亮度调整
+        if self.config["blur_radius"] > 0:
+            with self._stage("blur"):
+                img = self.blur(img, self.config["blur_radius"], brightness_lut)
+            brightness_lut = None
+        
+        # 调整亮度（根据主题配置）
+        if brightness_lut is not None:
+            with self._stage("brightness"):
+                img = img.point(brightness_lut)
+        
+        # 没有模糊和亮度调整时不能直接返回共享的原图
+        if img is source and self.source_cache_size > 0:
+            img = img.copy()
+        
+        # 放入缓存，超出内存上限时淘汰最久未使用的背景
+        img_bytes = img.width * img.height * len(img.getbands())
+        if img_bytes <= self.bg_cache_bytes:
+            self._bg_cache[key] = img
+            self._bg_cache_used_bytes += img_bytes
+            while self._bg_cache_used_bytes > self.bg_cache_bytes:
+                _, evicted = self._bg_cache.popitem(last=False)
+                self._bg_cache_used_bytes -= evicted.width * evicted.height * len(evicted.getbands())
+            return img.copy()
+        
+        return img
     
-    def draw_wave_background(self, img: Image, xy: Tuple, bg_color: Tuple, radius: int = 20) -> Image:
+    def _brightness_lut(self, factor: float) -> List[int]:
         """
-        绘制海浪形状的背景
+        生成亮度调整的查找表，结果与 ImageEnhance.Brightness 完全相同
+        
+        ImageEnhance.Brightness 将图片与alpha通道相同的全黑图像混合，RGB通道按 Image.blend 缩放，alpha通道不变；
+        这里用同样的 Image.blend 计算0-255的映射，保证舍入方式一致
         
         参数:
-            img: 原始图像
-            xy: 坐标 (x1, y1, x2, y2)
-            bg_color: 背景颜色
-            radius: 波浪半径
+            factor: 亮度系数
             
         返回:
-            添加海浪背景的图像
+            RGBA图片的查找表，RGB通道为亮度映射，alpha通道为恒等映射
         """
-        x1, y1, x2, y2 = xy
-        width = x2 - x1
-        height = y2 - y1
+        ramp = Image.frombytes('L', (256, 1), bytes(range(256)))
+        mapping = list(Image.blend(Image.new('L', (256, 1), 0), ramp, factor).tobytes())
+        return mapping * 3 + list(range(256))
+    
+    def _box_kernels(self, radius: float) -> Tuple[List[int], Optional[np.ndarray]]:
+        """
+        计算多次盒式模糊近似高斯模糊时每一次的盒子宽度，以及补足方差的修正核
         
-        # 创建一个透明图层
-        overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
+        次数由 blur_quality 决定(1-3次，与PIL高斯模糊内部的三次盒式模糊对应)，宽度只取相邻的两个奇数 wl 和 wl+2，
+        前 m 次用 wl、其余用 wl+2，m 取使总方差不超过 radius 平方的最小值；
+        奇数宽度凑不齐的剩余方差由一个两端为小数权重的窄盒子补足，总方差正好等于 radius 的平方
         
-        # 绘制主矩形背景
-        draw.rectangle([x1+radius, y1, x2-radius, y2], fill=bg_color)
-        draw.rectangle([x1, y1+radius, x2, y2-radius], fill=bg_color)
+        参数:
+            radius: 高斯模糊半径（标准差）
+            
+        返回:
+            (每一次盒式模糊的宽度列表, 一维修正核，不需要修正时为None)
+        """
+        passes = max(1, min(3, math.ceil(self.blur_quality * 3)))
+        variance = radius * radius
+        lower = int(math.sqrt(12 * variance / passes + 1))
+        lower -= lower % 2 == 0
+        lower = max(lower, 1)
+        upper = lower + 2
+        small = math.ceil((12 * variance - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+        small = max(0, min(passes, small))
+        sizes = [lower] * small + [upper] * (passes - small)
         
-        # 绘制四个圆角
+        residual = variance - sum((size * size - 1) / 12 for size in sizes)
+        if residual < 0.01:
+            return sizes, None
+        # 半宽为 half 的全1盒子两端各加一个权重为 weight 的像素，方差随 weight 连续变化
+        half = 0
+        while (half + 1) * (half + 2) / 3 <= residual:
+            half += 1
+        weight = (residual * (2 * half + 1) - half * (half + 1) * (2 * half + 1) / 3) / (2 * (half + 1) ** 2 - 2 * residual)
+        kernel = np.ones(2 * half + 3, dtype=np.float32)
+        kernel[0] = kernel[-1] = weight
+        return sizes, kernel / kernel.sum()
+    
+    def blur(self, img: Image, radius: float, lut: Optional[List[int]] = None) -> Image:
+        """
+        按 blur_backend 选择的方式模糊图片
+        
+        参数:
+            img: 要模糊的RGBA图片
+            radius: 高斯模糊半径
+            lut: 模糊后再应用的RGBA查找表（如亮度调整），box方式下在同一个NumPy缓冲区上完成，不再生成中间图像
+            
+        返回:
+            模糊后的新图片
+        """
+        if self.blur_backend == "box":
+            sizes, kernel = self._box_kernels(radius)
+            pixels = np.asarray(img)
+            for size in sizes:
+                pixels = cv2.blur(pixels, (size, size), borderType=cv2.BORDER_REPLICATE)
+            if kernel is not None:
+                pixels = cv2.sepFilter2D(pixels, -1, kernel, kernel, borderType=cv2.BORDER_REPLICATE)
+            if lut is not None:
+                # 每个通道各自的查找表，形状为 1×256×通道数
+                table = np.array(lut, dtype=np.uint8).reshape(-1, 256).T[None, :, :]
+                cv2.LUT(pixels, table, dst=pixels)
+            return Image.fromarray(pixels)
+        
+        if self.blur_backend == "downscale" and max(1, round(1 / self.blur_quality)) > 1:
+            # 结果本来就是模糊的，在缩小后的图片上模糊再放大回原尺寸
+            factor = max(1, round(1 / self.blur_quality))
+            small = img.reduce(factor).filter(ImageFilter.GaussianBlur(radius=radius / factor))
+            if lut is not None:
+                # 在缩小的图片上调整亮度，像素更少
+                small = small.point(lut)
+            return small.resize(img.size, Image.BILINEAR)
+        
+        img = img.filter(ImageFilter.GaussianBlur(radius=radius))
+        return img.point(lut) if lut is not None else img
+    
+    def _load_source(self, image_path: str, mtime: float) -> Image:
+        """
+        打开背景图片，转换为RGBA并缩放到设备尺寸
+        
+        source_cache_size 大于0时缓存解码和缩放结果，同一张背景只解码一次，每种设备模式只缩放一次
+        
+        参数:
+            image_path: 背景图片的绝对路径
+            mtime: 背景图片的修改时间
+            
+        返回:
+            缩放后的RGBA图片（可能是缓存中的共享对象，不要在上面绘制）
+        """
+        resized_key = (image_path, mtime, self.device_mode)
+        img = self._source_cache.get(resized_key)
+        if img is not None:
+            self._source_cache.move_to_end(resized_key)
+            return img
+        
+        decoded_key = (image_path, mtime, None)
+        decoded = self._source_cache.get(decoded_key)
+        if decoded is None:
+            # 打开图片并转换为RGBA
+            with self._stage("decode"):
+                decoded = Image.open(image_path)
+                draft_size = self._draft_size(decoded.width, decoded.height)
+                if draft_size is not None:
+                    # JPEG 在解码时按 1/2、1/4、1/8 缩小，不会小于 draft_size，其他格式忽略
+                    decoded.draft("RGB", draft_size)
+                decoded = decoded.convert("RGBA")
+            self._remember_source(decoded_key, decoded)
+        else:
+            self._source_cache.move_to_end(decoded_key)
+        
+        # 调整图片大小以适应设备
+        with self._stage("resize"):
+            img = self.resize_for_device(decoded)
+        self._remember_source(resized_key, img)
+        return img
+    
+    def _draft_size(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """
+        计算缩小解码时允许的最小尺寸，即所有共用解码结果的设备模式下缩放尺寸的最大值
+        
+        参数:
+            width: 原图宽度
+            height: 原图高度
+            
+        返回:
+            最小尺寸 (宽度, 高度)，不启用缩小解码或某个设备模式需要原始尺寸时返回None
+        """
+        if not self.draft_decode:
+            return None
+        draft_width, draft_height = 0, 0
+        for device_mode in self._source_device_modes:
+            size = self._resize_size(width, height, device_mode)
+            if size is None:
+                return None
+            draft_width = max(draft_width, size[0])
+            draft_height = max(draft_height, size[1])
+        return draft_width, draft_height
+    
+    def _remember_source(self, key: Tuple, img: Image) -> None:
+        """
+        将解码/缩放结果放入原图缓存，超出数量上限时淘汰最久未使用的
+        
+        参数:
+            key: (图片路径, 修改时间, 设备模式)
+            img: 图片
+        """
+        if self.source_cache_size <= 0:
+            return
+        self._source_cache[key] = img
+        while len(self._source_cache) > self.source_cache_size:
+            self._source_cache.popitem(last=False)
+    
+    def get_background_cache_stats(self) -> Dict[str, int]:
+        """
+        获取背景缓存的统计信息
+        
+        返回:
+            包含命中次数(hits)、未命中次数(misses)、当前缓存数量(size)、已用字节数(used_bytes)和内存上限(max_bytes)的字典
+        """
+        return {
+            "hits": self._bg_cache_hits,
+            "misses": self._bg_cache_misses,
+            "size": len(self._bg_cache),
+            "used_bytes": self._bg_cache_used_bytes,
+            "max_bytes": self.bg_cache_bytes
+        }
+    
+    def _create_overlay(self, img: Image, xy: Tuple) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        为指定区域创建裁剪后的透明图层，避免分配整张画布大小的图层
+        
+        参数:
+            img: 目标图像
+            xy: 需要覆盖的区域 (x1, y1, x2, y2)，包含右下角像素
+            
+        返回:
+            (透明图层, 图层在目标图像中的左上角坐标)
+        """
+        x1, y1, x2, y2 = xy
+        left = min(max(0, int(math.floor(x1))), img.width - 1)
+        top = min(max(0, int(math.floor(y1))), img.height - 1)
+        right = max(min(img.width, int(math.ceil(x2)) + 1), left + 1)
+        bottom = max(min(img.height, int(math.ceil(y2)) + 1), top + 1)
+        overlay = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        return overlay, (left, top)
+    
+    def draw_rounded_rectangle(self, draw: ImageDraw, xy: Tuple, radius: int = 20, fill: Tuple = None) -> None:
+        """
+        绘制圆角矩形
+        
+        参数:
+            draw: ImageDraw对象
+            xy: 坐标 (x1, y1, x2, y2)
+            radius: 圆角半径
+            fill: 填充颜色
+        """
+        x1, y1, x2, y2 = xy
+        # 绘制主矩形
+        draw.rectangle([(x1+radius, y1), (x2-radius, y2)], fill=fill)
+        draw.rectangle([(x1, y1+radius), (x2, y2-radius)], fill=fill)
+        # 绘制四个角
+        draw.pieslice([(x1, y1), (x1+radius*2, y1+radius*2)], 180, 270, fill=fill)
+        draw.pieslice([(x2-radius*2, y1), (x2, y1+radius*2)], 270, 360, fill=fill)
+        draw.pieslice([(x1, y2-radius*2), (x1+radius*2, y2)], 90, 180, fill=fill)
+        draw.pieslice([(x2-radius*2, y2-radius*2), (x2, y2)], 0, 90, fill=fill)
+    
+    def _get_rounded_mask(self, width: int, height: int, radius: int) -> Image:
+        """
+        获取圆角矩形蒙版，按 (宽度, 高度, 圆角半径) 缓存
+        
+        参数:
+            width: 蒙版宽度
+            height: 蒙版高度
+            radius: 圆角半径
+            
+        返回:
+            L模式的蒙版图像（只读，不要在上面绘制）
+        """
+        key = (width, height, radius)
+        mask = self._mask_cache.get(key)
+        if mask is not None:
+            self._mask_cache.move_to_end(key)
+            return mask
+        
+        mask = Image.new('L', (width, height), 0)
+        mask_draw = ImageDraw.Draw(mask)
+        self.draw_rounded_rectangle(mask_draw, (0, 0, width, height), radius, fill=255)
+        
+        self._mask_cache[key] = mask
+        if len(self._mask_cache) > self.mask_cache_size:
+            self._mask_cache.popitem(last=False)
+        return mask
+    
+    def _get_text_mask(self, text: str, font: ImageFont) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        获取一段文本栅格化后的alpha蒙版，按 (文本, 字体文件, 字号, 字体序号) 缓存
+        
+        阴影和正文、以及重复出现的单词共用同一份蒙版，每段文本只需栅格化一次
+        
+        参数:
+            text: 文本内容
+            font: 字体对象
+            
+        返回:
+            (L模式的蒙版图像, 蒙版左上角相对绘制位置的偏移)，蒙版只读，不要在上面绘制
+        """
+        font_file = getattr(font, "path", None)
+        if not isinstance(font_file, str):
+            # 内置默认字体没有文件路径，按对象区分
+            font_file = id(font)
+        key = (text, font_file, getattr(font, "size", None), getattr(font, "index", None))
+        cached = self._glyph_cache.get(key)
+        if cached is not None:
+            self._glyph_cache.move_to_end(key)
+            self._glyph_cache_hits += 1
+            return cached
+        
+        self._glyph_cache_misses += 1
+        left, top, right, bottom = font.getbbox(text)
+        mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+        
+        cached = (mask, (left, top))
+        self._glyph_cache[key] = cached
+        if len(self._glyph_cache) > self.glyph_cache_size:
+            self._glyph_cache.popitem(last=False)
+        return cached
+    
+    def _draw_text(self, img: Image, xy: Tuple[int, int], text: str, font: ImageFont, fill: Tuple) -> None:
+        """
+        使用缓存的文本蒙版绘制文本，效果与 ImageDraw.text 相同；字体不支持 getbbox 时直接使用 ImageDraw.text
+        
+        参数:
+            img: RGBA图像
+            xy: 文本绘制位置
+            text: 文本内容
+            font: 字体对象
+            fill: 文本颜色
+        """
+        if not hasattr(font, "getbbox"):
+            # PIL < 9.2 的内置位图字体没有 getbbox，无法预先计算蒙版尺寸，直接绘制
+            ImageDraw.Draw(img).text(xy, text, font=font, fill=fill)
+            return
+        
+        mask, (left, top) = self._get_text_mask(text, font)
+        img.paste(fill, (int(xy[0]) + left, int(xy[1]) + top), mask)
+    
+    def get_glyph_cache_stats(self) -> Dict[str, int]:
+        """
+        获取文本蒙版缓存的统计信息
+        
+        返回:
+            包含命中次数、未命中次数和当前缓存条目数的字典
+        """
+        return {
+            "hits": self._glyph_cache_hits,
+            "misses": self._glyph_cache_misses,
+            "size": len(self._glyph_cache)
+        }
+    
+    def draw_gradient_rectangle(self, img: Image, xy: Tuple, fill_top: Tuple, fill_bottom: Tuple, radius: int = 0) -> None:
+        """
+        绘制渐变矩形
+        
+        参数:
+            img: Image对象
+            xy: 坐标 (x1, y1, x2, y2)
+            fill_top: 顶部颜色
+            fill_bottom: 底部颜色
+            radius: 圆角半径
+        """
+        x1, y1, x2, y2 = xy
+        width = x2 - x1
+        height = y2 - y1
+        
+        # 创建渐变图像 - 按行对四个通道同时做线性插值，一次生成整个数组
+        rows = np.arange(height, dtype=np.float64)[:, None]
+        top = np.array(fill_top[:4], dtype=np.float64)
+        bottom = np.array(fill_bottom[:4], dtype=np.float64)
+        row_colors = (top + (bottom - top) * rows / height).astype(np.uint8)
+        # 每行颜色相同，只转换一列像素，再由PIL横向复制到整个宽度
+        gradient = Image.fromarray(row_colors[:, None, :]).resize((width, height), Image.NEAREST)
+        
+        # 如果需要圆角
+        if radius > 0:
+            gradient.putalpha(self._get_rounded_mask(width, height, radius))
+        
+        # 粘贴到原图
+        img.paste(gradient, (x1, y1), gradient)
+    
+    def draw_wave_background(self, img: Image, xy: Tuple, bg_color: Tuple, radius: int = 20) -> Image:
+        """
+        绘制海浪形状的背景
+        
+        参数:
+            img: 原始图像
+            xy: 坐标 (x1, y1, x2, y2)
+            bg_color: 背景颜色
+            radius: 波浪半径
+            
+        返回:
+            添加海浪背景的图像（直接在原图上合成）
+        """
+        x1, y1, x2, y2 = xy
+        wave_height = radius * 0.7
+        
+        # 创建只覆盖海浪区域的透明图层，并换算到图层内的坐标
+        overlay, (offset_x, offset_y) = self._create_overlay(img, (x1, y1 - wave_height, x2, y2 + wave_height))
+        local_xy = (x1 - offset_x, y1 - offset_y, x2 - offset_x, y2 - offset_y)
+        self._draw_wave_shape(ImageDraw.Draw(overlay), local_xy, bg_color, radius)
+        
+        # 只在海浪区域内合并图层
+        img.alpha_composite(overlay, dest=(offset_x, offset_y))
+        return img
+    
+    def _draw_wave_shape(self, draw: ImageDraw, xy: Tuple, bg_color: Tuple, radius: int = 20) -> None:
+        """
+        绘制海浪形状，波浪会超出坐标范围上下各 radius * 0.7 像素
+        
+        参数:
+            draw: ImageDraw对象
+            xy: 坐标 (x1, y1, x2, y2)
+            bg_color: 背景颜色
+            radius: 波浪半径
+        """
+        x1, y1, x2, y2 = xy
+        width = x2 - x1
+        wave_height = radius * 0.7
+        
+        # 绘制主矩形背景
+        draw.rectangle([x1+radius, y1, x2-radius, y2], fill=bg_color)
+        draw.rectangle([x1, y1+radius, x2, y2-radius], fill=bg_color)
+        
+        # 绘制四个圆角
         draw.pieslice([x1, y1, x1+radius*2, y1+radius*2], 180, 270, fill=bg_color)
         draw.pieslice([x2-radius*2, y1, x2, y1+radius*2], 270, 360, fill=bg_color)
         draw.pieslice([x1, y2-radius*2, x1+radius*2, y2], 90, 180, fill=bg_color)
         draw.pieslice([x2-radius*2, y2-radius*2, x2, y2], 0, 90, fill=bg_color)
         
         # 添加波浪效果 - 顶部
-        wave_height = radius * 0.7
         wave_width = width / 8  # 8个波
         
         # 绘制顶部波浪
@@ -471,9 +1481,96 @@ class ImageWordGenerator:
         
         # 填充路径
         draw.polygon(path, fill=bg_color)
+    
+    def _draw_panel(self, overlay: Image, xy: Tuple, bg_color: Tuple) -> None:
+        """
+        按主题在透明图层上绘制矩形类背景面板（普通、圆角、渐变）
+        
+        参数:
+            overlay: 透明图层
+            xy: 面板在图层中的坐标 (x1, y1, x2, y2)
+            bg_color: 背景颜色
+        """
+        overlay_draw = ImageDraw.Draw(overlay)
         
-        # 合并图层
-        return Image.alpha_composite(img, overlay)
+        if self.config["rounded_bg"]:
+            # 绘制圆角背景
+            if self.config["gradient_bg"]:
+                # 渐变圆角背景
+                top_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3])
+                bottom_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3] // 2)
+                self.draw_gradient_rectangle(
+                    overlay, xy,
+                    top_color, bottom_color, radius=20  # 减小圆角半径（原为30）
+                )
+            else:
+                # 普通圆角背景
+                self.draw_rounded_rectangle(
+                    overlay_draw, xy,
+                    radius=20,  # 减小圆角半径（原为30）
+                    fill=bg_color
+                )
+        else:
+            # 普通矩形背景
+            if self.config["gradient_bg"]:
+                # 渐变背景
+                top_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3])
+                bottom_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3] // 2)
+                self.draw_gradient_rectangle(overlay, xy, top_color, bottom_color)
+            else:
+                # 普通背景
+                overlay_draw.rectangle(list(xy), fill=bg_color)
+    
+    def _get_panel_sprite(self, width: int, height: int, bg_color: Tuple) -> Tuple[Image.Image, int]:
+        """
+        获取预渲染的背景面板，按 (主题, 背景样式, 宽度, 高度, 颜色) 缓存
+        
+        参数:
+            width: 面板宽度
+            height: 面板高度
+            bg_color: 背景颜色
+            
+        返回:
+            (面板图层, 面板上方的额外边距)，海浪样式的波浪会超出面板上下边缘
+        """
+        key = (self.theme, self.bg_style, width, height, bg_color)
+        cached = self._sprite_cache.get(key)
+        if cached is not None:
+            self._sprite_cache.move_to_end(key)
+            return cached
+        
+        if self.bg_style == "wave":
+            radius = 20
+            margin = int(math.ceil(radius * 0.7))
+            sprite = Image.new('RGBA', (width + 1, height + 1 + margin * 2), (0, 0, 0, 0))
+            self._draw_wave_shape(ImageDraw.Draw(sprite), (0, margin, width, margin + height), bg_color, radius)
+        else:
+            margin = 0
+            sprite = Image.new('RGBA', (width + 1, height + 1), (0, 0, 0, 0))
+            self._draw_panel(sprite, (0, 0, width, height), bg_color)
+        
+        self._sprite_cache[key] = (sprite, margin)
+        if len(self._sprite_cache) > self.sprite_cache_size:
+            self._sprite_cache.popitem(last=False)
+        return sprite, margin
+    
+    def _composite_sprite(self, img: Image, sprite: Image, position: Tuple[int, int]) -> None:
+        """
+        将图层alpha混合到图像的指定位置，超出图像边缘的部分会被裁掉
+        
+        参数:
+            img: 目标图像（直接修改）
+            sprite: RGBA图层
+            position: 图层左上角在目标图像中的坐标
+        """
+        x, y = position
+        source_x, source_y = max(0, -x), max(0, -y)
+        dest_x, dest_y = max(0, x), max(0, y)
+        source_right = min(sprite.width, img.width - x)
+        source_bottom = min(sprite.height, img.height - y)
+        if source_right <= source_x or source_bottom <= source_y:
+            return
+        img.alpha_composite(sprite, dest=(dest_x, dest_y), source=(source_x, source_y, source_right, source_bottom))
     
     def add_decorative_elements(self, draw: ImageDraw, width: int, height: int, en_text_y: int, cn_text_y: int) -> None:
         """
@@ -501,6 +1598,200 @@ class ImageWordGenerator:
                 width=1
             )
     
+    def _fit_font_size(self, text: str, font_path: str, font_type: str, font_size: int, min_size: int, max_width: float) -> int:
+        """
+        在 [min_size, font_size] 范围内查找能让文本宽度不超过 max_width 的最大字号
+        
+        先按宽度比例估算一个字号，再在剩余区间内二分查找，测量次数为 O(log 字号范围)；
+        各字号的字体对象来自字体缓存，不会重复解析字体文件
+        
+        参数:
+            text: 文本
+            font_path: 字体文件路径
+            font_type: 字体类型，'en'为英文，'cn'为中文，'phonetic'为音标
+            font_size: 初始字号（上限）
+            min_size: 最小字号，文本在最小字号下仍放不下时返回最小字号
+            max_width: 最大文本宽度
+            
+        返回:
+            合适的字号
+        """
+        def text_width(size: int) -> int:
+            return self.get_text_size(text, self._load_font(font_path, size, font_type))[0]
+        
+        width = text_width(font_size)
+        if width <= max_width or font_size <= min_size:
+            return font_size
+        
+        # 已知 font_size 放不下；low 始终是可接受的字号（放得下或为最小字号）
+        low, high = min_size, font_size - 1
+        
+        # 文本宽度大致与字号成正比，先检查按比例估算的字号以缩小查找区间
+        guess = min(max(int(font_size * max_width / width), low), high)
+        if text_width(guess) <= max_width:
+            low = guess
+        else:
+            high = guess - 1
+        
+        while low < high:
+            mid = (low + high + 1) // 2
+            if text_width(mid) <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+    
+    def compute_layout(self, en_text: str, phonetic_text: str, cn_text: str, width: int, height: int) -> CardLayout:
+        """
+        计算单词卡片的排版：字号、文本尺寸和位置以及背景面板的位置
+        
+        排版只取决于文本、画布尺寸和字体设置，与背景图片的像素、主题和背景样式无关
+        
+        参数:
+            en_text: 英文文本
+            phonetic_text: 音标文本
+            cn_text: 中文文本
+            width: 画布宽度
+            height: 画布高度
+            
+        返回:
+            卡片排版
+        """
+        # 动态调整字体大小 - 根据文本长度调整
+        adjusted_font_size_en = self.font_size_en
+        adjusted_font_size_cn = self.font_size_cn
+        adjusted_font_size_phonetic = self.font_size_phonetic
+        
+        # 对长文本进行动态缩放
+        max_width = width * 0.75  # 文本最大宽度为图像宽度的75%，使整体布局更加舒适
+        
+        # 英文文本缩放 - 更激进的缩放策略
+        if len(en_text) > 10:  # 超过10个字符就开始缩放
+            scale_factor = min(1.0, 10 / len(en_text) * 1.3)  # 针对长文本缩放系数
+            adjusted_font_size_en = max(int(adjusted_font_size_en * scale_factor), 32)  # 降低最小字号为32
+        
+        # 中文文本缩放 - 更激进的缩放策略
+        if len(cn_text) > 5:  # 超过5个字符就开始缩放
+            scale_factor = min(1.0, 5 / len(cn_text) * 1.3)  # 针对长文本缩放系数
+            adjusted_font_size_cn = max(int(adjusted_font_size_cn * scale_factor), 28)  # 降低最小字号为28
+        
+        # 音标文本缩放 - 与英文文本成比例
+        if phonetic_text:
+            phonetic_scale = adjusted_font_size_en / self.font_size_en
+            adjusted_font_size_phonetic = max(int(self.font_size_phonetic * phonetic_scale), 15)  # 降低最小字号为15
+        
+        # 确保英文文本不超过最大宽度：找到能放下的最大字号，音标字号同比例缩小
+        fitted_font_size_en = self._fit_font_size(en_text, self.font_path_en, "en", adjusted_font_size_en, 28, max_width)
+        if fitted_font_size_en < adjusted_font_size_en:
+            scale_factor = fitted_font_size_en / adjusted_font_size_en
+            adjusted_font_size_phonetic = max(int(adjusted_font_size_phonetic * scale_factor), 12)
+            adjusted_font_size_en = fitted_font_size_en
+        
+        # 确保中文文本不超过最大宽度
+        adjusted_font_size_cn = self._fit_font_size(cn_text, self.font_path_cn, "cn", adjusted_font_size_cn, 22, max_width)
+        
+        # 加载调整后的字体（都已在字体缓存中）
+        font_en = self._load_font(self.font_path_en, adjusted_font_size_en, "en")
+        font_cn = self._load_font(self.font_path_cn, adjusted_font_size_cn, "cn")
+        font_phonetic = self._load_font(self.font_path_en, adjusted_font_size_phonetic, "phonetic")
+        
+        # 计算文本尺寸
+        en_text_width, en_text_height = self.get_text_size(en_text, font_en)
+        
+        phonetic_text_width, phonetic_text_height = 0, 0
+        if phonetic_text:
+            try:
+                # 尝试使用支持音标的字体计算大小
+                phonetic_text_width, phonetic_text_height = self.get_text_size(phonetic_text, font_phonetic)
+            except Exception as e:
+                print(f"计算音标尺寸时出错: {e}，将使用估算值")
+                # 如果无法计算音标尺寸，使用估算值
+                phonetic_text_width = len(phonetic_text) * (adjusted_font_size_phonetic // 2)
+                phonetic_text_height = adjusted_font_size_phonetic
+        
+        # 计算中文文本尺寸
+        cn_text_width, cn_text_height = self.get_text_size(cn_text, font_cn)
+        
+        # 进一步减小元素之间的间距，使整体更紧凑
+        spacing_en_to_phonetic = 18  # 英文到音标的间距（原为25）
+        spacing_phonetic_to_cn = 25  # 音标到中文的间距（原为35）
+        spacing_en_to_cn = 30  # 如果没有音标，英文到中文的间距（原为40）
+        
+        # 计算总文本高度
+        if phonetic_text:
+            total_text_height = en_text_height + phonetic_text_height + cn_text_height + spacing_en_to_phonetic + spacing_phonetic_to_cn
+        else:
+            total_text_height = en_text_height + cn_text_height + spacing_en_to_cn
+        
+        # 计算文本位置 - 上中下布局
+        text_y_start = (height - total_text_height) // 2
+        en_text_x = (width - en_text_width) // 2
+        en_text_y = text_y_start
+        
+        # 音标位置（如果有）
+        phonetic_text_x = 0
+        phonetic_text_y = 0
+        current_y = en_text_y + en_text_height
+        
+        if phonetic_text:
+            current_y += spacing_en_to_phonetic
+            phonetic_text_x = (width - phonetic_text_width) // 2
+            phonetic_text_y = current_y
+            current_y += phonetic_text_height + spacing_phonetic_to_cn
+        else:
+            current_y += spacing_en_to_cn
+        
+        # 中文位置
+        cn_text_x = (width - cn_text_width) // 2
+        cn_text_y = current_y
+        
+        # 背景面板位置
+        padding = 25  # 进一步减小内边距（原为30）
+        bg_rect_width = max(en_text_width, phonetic_text_width, cn_text_width) + padding * 2
+        bg_rect_height = total_text_height + padding * 2
+        bg_rect_x = (width - bg_rect_width) // 2
+        bg_rect_y = text_y_start - padding
+        
+        return CardLayout(
+            font_en=font_en,
+            font_phonetic=font_phonetic,
+            font_cn=font_cn,
+            en_text_pos=(en_text_x, en_text_y),
+            phonetic_text_pos=(phonetic_text_x, phonetic_text_y),
+            cn_text_pos=(cn_text_x, cn_text_y),
+            panel_xy=(bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height),
+            divider_y=(en_text_y, phonetic_text_y if phonetic_text else (cn_text_y - spacing_en_to_cn // 2))
+        )
+    
+    def get_layout(self, en_text: str, phonetic_text: str, cn_text: str, width: int, height: int) -> CardLayout:
+        """
+        获取单词卡片的排版，结果按 (文本, 画布尺寸, 字体设置) 缓存
+        
+        同一套单词换背景或换背景样式重新生成时，不需要重新测量文本
+        
+        参数:
+            en_text: 英文文本
+            phonetic_text: 音标文本
+            cn_text: 中文文本
+            width: 画布宽度
+            height: 画布高度
+            
+        返回:
+            卡片排版
+        """
+        key = (en_text, phonetic_text, cn_text, width, height,
+               self.font_path_en, self.font_path_cn, self.font_size_en, self.font_size_cn, self.font_size_phonetic)
+        layout = self._layout_cache.get(key)
+        if layout is not None:
+            self._layout_cache.move_to_end(key)
+            return layout
+        
+        layout = self.compute_layout(en_text, phonetic_text, cn_text, width, height)
+        self._layout_cache[key] = layout
+        if len(self._layout_cache) > self.layout_cache_size:
+            self._layout_cache.popitem(last=False)
+        return layout
+    
     def add_text_to_image(self, image_path: str, en_text: str, phonetic_text: str, cn_text: str, output_path: str) -> Optional[str]:
         """
         在图片中添加英文、音标和中文文本
@@ -515,327 +1806,720 @@ class ImageWordGenerator:
         返回:
             输出图片路径，出错时返回None
         """
-        try:
-            # 打开图片并转换为RGBA
-            img = Image.open(image_path).convert("RGBA")
-            
-            # 调整图片大小以适应设备
-            img = self.resize_for_device(img)
-            
-            # 应用模糊效果（根据主题配置）
-            if self.config["blur_radius"] > 0:
-                img = img.filter(ImageFilter.GaussianBlur(radius=self.config["blur_radius"]))
-            
-            # 调整亮度（根据主题配置）
-            if self.config["brightness"] != 1.0:
-                enhancer = ImageEnhance.Brightness(img)
-                img = enhancer.enhance(self.config["brightness"])
-            
-            # 获取图片尺寸
-            width, height = img.size
-            
-            # 创建绘图对象
-            draw = ImageDraw.Draw(img)
-            
-            # 动态调整字体大小 - 根据文本长度调整
-            adjusted_font_size_en = self.font_size_en
-            adjusted_font_size_cn = self.font_size_cn
-            adjusted_font_size_phonetic = self.font_size_phonetic
-            
-            # 对长文本进行动态缩放
-            max_width = width * 0.75  # 文本最大宽度为图像宽度的75%，使整体布局更加舒适
-            
-            # 英文文本缩放 - 更激进的缩放策略
-            if len(en_text) > 10:  # 超过10个字符就开始缩放
-                scale_factor = min(1.0, 10 / len(en_text) * 1.3)  # 针对长文本缩放系数
-                adjusted_font_size_en = max(int(adjusted_font_size_en * scale_factor), 32)  # 降低最小字号为32
-            
-            # 中文文本缩放 - 更激进的缩放策略
-            if len(cn_text) > 5:  # 超过5个字符就开始缩放
-                scale_factor = min(1.0, 5 / len(cn_text) * 1.3)  # 针对长文本缩放系数
-                adjusted_font_size_cn = max(int(adjusted_font_size_cn * scale_factor), 28)  # 降低最小字号为28
-            
-            # 音标文本缩放 - 与英文文本成比例
-            if phonetic_text:
-                phonetic_scale = adjusted_font_size_en / self.font_size_en
-                adjusted_font_size_phonetic = max(int(self.font_size_phonetic * phonetic_scale), 15)  # 降低最小字号为15
-            
-            # 加载调整后的字体
-            font_en = self._load_font(self.font_path_en, adjusted_font_size_en, "en")
-            font_cn = self._load_font(self.font_path_cn, adjusted_font_size_cn, "cn")
-            font_phonetic = self._load_font(self.font_path_en, adjusted_font_size_phonetic, "phonetic")
-            
-            # 计算文本尺寸
-            en_text_width, en_text_height = self.get_text_size(en_text, font_en)
-            
-            # 确保文本不超过最大宽度
-            if en_text_width > max_width:
-                # 如果仍然超过最大宽度，继续减小字体大小
-                scale_factor = max_width / en_text_width
-                adjusted_font_size_en = max(int(adjusted_font_size_en * scale_factor), 28)
-                adjusted_font_size_phonetic = max(int(adjusted_font_size_phonetic * scale_factor), 12)
-                
-                # 重新加载调整后的字体
-                font_en = self._load_font(self.font_path_en, adjusted_font_size_en, "en")
-                font_phonetic = self._load_font(self.font_path_en, adjusted_font_size_phonetic, "phonetic")
-                
-                # 重新计算文本尺寸
-                en_text_width, en_text_height = self.get_text_size(en_text, font_en)
-            
-            phonetic_text_width, phonetic_text_height = 0, 0
-            if phonetic_text:
-                try:
-                    # 尝试使用支持音标的字体计算大小
-                    phonetic_text_width, phonetic_text_height = self.get_text_size(phonetic_text, font_phonetic)
-                except Exception as e:
-                    print(f"计算音标尺寸时出错: {e}，将使用估算值")
-                    # 如果无法计算音标尺寸，使用估算值
-                    phonetic_text_width = len(phonetic_text) * (adjusted_font_size_phonetic // 2)
-                    phonetic_text_height = adjusted_font_size_phonetic
-            
-            # 计算中文文本尺寸
-            cn_text_width, cn_text_height = self.get_text_size(cn_text, font_cn)
-            
-            # 如果中文文本超过最大宽度，继续减小字体大小
-            if cn_text_width > max_width:
-                scale_factor = max_width / cn_text_width
-                adjusted_font_size_cn = max(int(adjusted_font_size_cn * scale_factor), 22)
-                
-                # 重新加载调整后的字体
-                font_cn = self._load_font(self.font_path_cn, adjusted_font_size_cn, "cn")
-                
-                # 重新计算文本尺寸
-                cn_text_width, cn_text_height = self.get_text_size(cn_text, font_cn)
-            
-            # 进一步减小元素之间的间距，使整体更紧凑
-            spacing_en_to_phonetic = 18  # 英文到音标的间距（原为25）
-            spacing_phonetic_to_cn = 25  # 音标到中文的间距（原为35）
-            spacing_en_to_cn = 30  # 如果没有音标，英文到中文的间距（原为40）
+        return self._write_card(image_path, en_text, phonetic_text, cn_text, output_path)[0]
+    
+    def _write_card(self, image_path: str, en_text: str, phonetic_text: str, cn_text: str,
+                    output_path: str) -> Tuple[Optional[str], int]:
+        """
+        生成单词卡片并写入文件，与 add_text_to_image 相同，同时返回写入的字节数
+        
+        参数:
+            image_path: 背景图片路径
+            en_text: 英文文本
+            phonetic_text: 音标文本
+            cn_text: 中文文本
+            output_path: 输出图片路径
             
-            # 计算总文本高度
-            if phonetic_text:
-                total_text_height = en_text_height + phonetic_text_height + cn_text_height + spacing_en_to_phonetic + spacing_phonetic_to_cn
-            else:
-                total_text_height = en_text_height + cn_text_height + spacing_en_to_cn
+        返回:
+            (输出图片路径, 写入的字节数)，出错时为 (None, 0)
+        """
+        try:
+            # 获取缩放、模糊和亮度调整后的背景（优先使用缓存）
+            img = self._prepare_background(image_path)
             
-            # 计算文本位置 - 上中下布局
-            text_y_start = (height - total_text_height) // 2
-            en_text_x = (width - en_text_width) // 2
-            en_text_y = text_y_start
+            # 绘制背景面板、装饰和文本
+            self._draw_card(img, en_text, phonetic_text, cn_text)
             
-            # 音标位置（如果有）
-            phonetic_text_x = 0
-            phonetic_text_y = 0
-            current_y = en_text_y + en_text_height
+            with self._stage("encode"):
+                # 按选择的编码器保存图片
+                output_bytes = self.encoder.encode(img, output_path)
             
-            if phonetic_text:
-                current_y += spacing_en_to_phonetic
-                phonetic_text_x = (width - phonetic_text_width) // 2
-                phonetic_text_y = current_y
-                current_y += phonetic_text_height + spacing_phonetic_to_cn
-            else:
-                current_y += spacing_en_to_cn
+            print(f"已生成图片: {output_path}")
             
-            # 中文位置
-            cn_text_x = (width - cn_text_width) // 2
-            cn_text_y = current_y
+            return output_path, output_bytes
             
+        except Exception as e:
+            print(f"处理图片 {image_path} 时出错: {e}")
+            return None, 0
+    
+    def _draw_card(self, img: Image, en_text: str, phonetic_text: str, cn_text: str) -> None:
+        """
+        在预处理后的背景上绘制背景面板、装饰元素和文本
+        
+        参数:
+            img: 预处理后的RGBA背景图片，直接在上面绘制
+            en_text: 英文文本
+            phonetic_text: 音标文本
+            cn_text: 中文文本
+        """
+        # 获取图片尺寸
+        width, height = img.size
+        
+        # 创建绘图对象
+        draw = ImageDraw.Draw(img)
+        
+        with self._stage("layout"):
+            layout = self.get_layout(en_text, phonetic_text, cn_text, width, height)
+        
+        with self._stage("composite"):
             # 如果需要背景矩形
             if self.config["bg_opacity"] > 0:
-                padding = 25  # 进一步减小内边距（原为30）
-                bg_rect_width = max(en_text_width, phonetic_text_width, cn_text_width) + padding * 2
-                bg_rect_height = total_text_height + padding * 2
-                bg_rect_x = (width - bg_rect_width) // 2
-                bg_rect_y = text_y_start - padding
-                
                 # 降低背景透明度，让背景不那么突兀
                 bg_color = list(self.config["bg_color"])
                 if bg_color[3] > 60:  # 如果原透明度大于60
                     bg_color[3] = int(bg_color[3] * 0.8)  # 降低透明度到原来的80%
                 bg_color = tuple(bg_color)
                 
-                # 创建透明层
-                overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
+                # 面板尺寸向上取整到 panel_quantum 的倍数并保持居中，使相近尺寸的卡片共用同一个预渲染面板
+                x1, y1, x2, y2 = layout.panel_xy
+                panel_width = -(-(x2 - x1) // self.panel_quantum) * self.panel_quantum
+                panel_height = -(-(y2 - y1) // self.panel_quantum) * self.panel_quantum
+                x1 -= (panel_width - (x2 - x1)) // 2
+                y1 -= (panel_height - (y2 - y1)) // 2
                 
-                # 根据背景样式选择不同的绘制方法
-                if self.bg_style == "wave":
-                    # 绘制海浪形状背景
-                    img = self.draw_wave_background(
-                        img, 
-                        (bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height),
-                        bg_color
-                    )
-                    draw = ImageDraw.Draw(img)
-                else:
-                    # 原有的矩形背景绘制方式
-                    overlay_draw = ImageDraw.Draw(overlay)
-                    
-                    if self.config["rounded_bg"]:
-                        # 绘制圆角背景
-                        if self.config["gradient_bg"]:
-                            # 渐变圆角背景
-                            top_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3])
-                            bottom_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3] // 2)
-                            self.draw_gradient_rectangle(
-                                overlay, 
-                                (bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height),
-                                top_color, bottom_color, radius=20  # 减小圆角半径（原为30）
-                            )
-                        else:
-                            # 普通圆角背景
-                            self.draw_rounded_rectangle(
-                                overlay_draw,
-                                (bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height),
-                                radius=20,  # 减小圆角半径（原为30）
-                                fill=bg_color
-                            )
-                        
-                        # 合并图层
-                        img = Image.alpha_composite(img, overlay)
-                        draw = ImageDraw.Draw(img)
-                    else:
-                        # 普通矩形背景
-                        if self.config["gradient_bg"]:
-                            # 渐变背景
-                            top_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3])
-                            bottom_color = (bg_color[0], bg_color[1], bg_color[2], bg_color[3] // 2)
-                            self.draw_gradient_rectangle(
-                                overlay, 
-                                (bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height),
-                                top_color, bottom_color
-                            )
-                        else:
-                            # 普通背景
-                            overlay_draw.rectangle(
-                                [bg_rect_x, bg_rect_y, bg_rect_x + bg_rect_width, bg_rect_y + bg_rect_height],
-                                fill=bg_color
-                            )
-                        
-                        # 合并图层
-                        img = Image.alpha_composite(img, overlay)
-                        draw = ImageDraw.Draw(img)
+                # 粘贴预渲染的面板，每张卡片只需一次alpha混合
+                sprite, margin = self._get_panel_sprite(panel_width, panel_height, bg_color)
+                self._composite_sprite(img, sprite, (x1, y1 - margin))
             
             # 添加装饰元素（如果配置允许）
             if self.config["decoration"]:
                 # 缩小装饰线宽度
-                self.add_decorative_elements(draw, width, height, en_text_y, phonetic_text_y if phonetic_text else (cn_text_y - spacing_en_to_cn // 2))
-            
+                self.add_decorative_elements(draw, width, height, *layout.divider_y)
+        
+        with self._stage("text"):
             # 添加文本阴影效果（如果配置允许）
             shadow_offset = self.config["shadow_offset"]
             shadow_color = self.config["shadow_color"]
+            font_en, font_phonetic, font_cn = layout.font_en, layout.font_phonetic, layout.font_cn
+            en_text_x, en_text_y = layout.en_text_pos
+            phonetic_text_x, phonetic_text_y = layout.phonetic_text_pos
+            cn_text_x, cn_text_y = layout.cn_text_pos
             
             if shadow_offset > 0:
                 # 绘制英文文本阴影
-                draw.text((en_text_x + shadow_offset, en_text_y + shadow_offset), 
-                          en_text, font=font_en, fill=shadow_color)
+                self._draw_text(img, (en_text_x + shadow_offset, en_text_y + shadow_offset), 
+                                en_text, font_en, shadow_color)
                 
                 # 绘制音标文本阴影（如果有）
                 if phonetic_text:
-                    draw.text((phonetic_text_x + shadow_offset, phonetic_text_y + shadow_offset), 
-                              phonetic_text, font=font_phonetic, fill=shadow_color)
+                    self._draw_text(img, (phonetic_text_x + shadow_offset, phonetic_text_y + shadow_offset), 
+                                    phonetic_text, font_phonetic, shadow_color)
                 
                 # 绘制中文文本阴影
-                draw.text((cn_text_x + shadow_offset, cn_text_y + shadow_offset), 
-                          cn_text, font=font_cn, fill=shadow_color)
+                self._draw_text(img, (cn_text_x + shadow_offset, cn_text_y + shadow_offset), 
+                                cn_text, font_cn, shadow_color)
             
-            # 绘制英文文本
-            draw.text((en_text_x, en_text_y), en_text, font=font_en, fill=self.config["text_color"])
+            # 绘制英文文本（与阴影共用同一份文本蒙版）
+            self._draw_text(img, (en_text_x, en_text_y), en_text, font_en, self.config["text_color"])
             
             # 绘制音标文本（如果有）
             if phonetic_text:
                 try:
-                    draw.text((phonetic_text_x, phonetic_text_y), phonetic_text, font=font_phonetic, fill=self.config["text_color"])
+                    self._draw_text(img, (phonetic_text_x, phonetic_text_y), phonetic_text, font_phonetic, self.config["text_color"])
                 except Exception as e:
                     # 如果使用特殊音标字符失败，尝试使用基本字符
                     print(f"绘制音标文本失败: {e}")
                     # 尝试将特殊音标字符替换为基本ASCII字符
                     simplified_phonetic = phonetic_text.encode('ascii', 'replace').decode('ascii')
-                    draw.text((phonetic_text_x, phonetic_text_y), simplified_phonetic, font=font_phonetic, fill=self.config["text_color"])
+                    self._draw_text(img, (phonetic_text_x, phonetic_text_y), simplified_phonetic, font_phonetic, self.config["text_color"])
             
             # 绘制中文文本
-            draw.text((cn_text_x, cn_text_y), cn_text, font=font_cn, fill=self.config["text_color"])
+            self._draw_text(img, (cn_text_x, cn_text_y), cn_text, font_cn, self.config["text_color"])
+    
+    def _render_job(self, job: Tuple) -> Tuple[Union[Optional[str], Tuple[Optional[str], ...]], int, Optional[Dict[str, float]]]:
+        """
+        渲染单个单词卡片任务
+        
+        参数:
+            job: (序号, 单词数据, 背景图片路径, 输出路径)；
+                 多变体模式下输出路径为 ((变体序号, 输出路径), ...)
             
-            # 保存图片
-            img = img.convert("RGB")  # 转换为RGB以保存为JPG
-            img.save(output_path, quality=95)
-            print(f"已生成图片: {output_path}")
+        返回:
+            (输出图片路径, 输出文件的字节数, 各阶段耗时)，出错时输出图片路径为None；未启用 stage_timer 时各阶段耗时为None。
+            多变体模式下输出图片路径为与任务中输出路径一一对应的元组，字节数和各阶段耗时为该单词所有变体的合计
+        """
+        _, word_data, image_path, output_path = job
+        en_text, phonetic_text, cn_text = self._split_word_data(word_data)
+        
+        if self.stage_timer is None:
+            return (*self._render_card(image_path, en_text, phonetic_text, cn_text, output_path), None)
+        
+        # 记录这张卡片各阶段的耗时，同时保留已有的阶段观察者
+        card_timings = {}
+        previous_observer = self.stage_observer
+        
+        def observe(stage: str, seconds: float) -> None:
+            card_timings[stage] = card_timings.get(stage, 0.0) + seconds
+            if previous_observer is not None:
+                previous_observer(stage, seconds)
+        
+        self.stage_observer = observe
+        try:
+            start = time.perf_counter()
+            result, output_bytes = self._render_card(image_path, en_text, phonetic_text, cn_text, output_path)
+            card_timings["card"] = time.perf_counter() - start
+        finally:
+            self.stage_observer = previous_observer
+        
+        return result, output_bytes, card_timings
+    
+    @staticmethod
+    def _split_word_data(word_data: Tuple) -> Tuple[str, str, str]:
+        """
+        将单词数据统一为 (英文, 音标, 中文)
+        
+        参数:
+            word_data: 三段式 (英文, 音标, 中文) 或两段式 (英文, 中文)
             
-            return output_path
+        返回:
+            (英文, 音标, 中文)，两段式的音标为空字符串
+        """
+        if len(word_data) == 3:  # 三段式
+            return word_data
+        return word_data[0], "", word_data[1]  # 两段式
+    
+    def _render_card(self, image_path: str, en_text: str, phonetic_text: str, cn_text: str,
+                     output_path: Union[str, Tuple[Tuple[int, str], ...]]) -> Tuple[Union[Optional[str], Tuple[Optional[str], ...]], int]:
+        """
+        渲染一个单词的卡片，多变体模式下依次渲染所有需要生成的变体
+        
+        参数:
+            image_path: 背景图片路径
+            en_text: 英文文本
+            phonetic_text: 音标文本
+            cn_text: 中文文本
+            output_path: 输出图片路径；多变体模式下为 ((变体序号, 输出路径), ...)
             
-        except Exception as e:
-            print(f"处理图片 {image_path} 时出错: {e}")
-            return None
+        返回:
+            (输出图片路径, 写入的字节数)，出错时输出图片路径为None；多变体模式下输出图片路径为对应的元组，字节数为合计
+        """
+        if not self.variants:
+            return self._write_card(image_path, en_text, phonetic_text, cn_text, output_path)
+        
+        # 同一个单词的所有变体连续渲染，背景解码和排版结果在变体之间共用
+        results = []
+        total_bytes = 0
+        for index, variant_output_path in output_path:
+            variant = self.variants[index]
+            variant.stage_observer = self.stage_observer
+            result, output_bytes = variant._write_card(image_path, en_text, phonetic_text, cn_text, variant_output_path)
+            results.append(result)
+            total_bytes += output_bytes
+        return tuple(results), total_bytes
+    
+    def _render_jobs(self, jobs: Iterable[Tuple], workers: int = 1,
+                     pipeline_depth: int = 0) -> Iterator[Tuple[Tuple, object, Optional[str], int, Optional[Dict[str, float]]]]:
+        """
+        渲染单词卡片任务，workers大于1时使用进程池并行渲染
+        
+        任务按需从迭代器中取出，同时在途的任务数量有上限，因此内存占用不随单词数量增长。
+        工作进程异常退出(例如内存不足被杀死)时，在途的任务记为失败，重新创建进程池继续渲染剩余任务；
+        连续重建超过 MAX_POOL_RESTARTS 次后不再渲染，剩余任务全部记为失败
+        
+        参数:
+            jobs: 渲染任务迭代器
+            workers: 工作进程数量
+            pipeline_depth: 单进程渲染时流水线各阶段之间队列的长度，为0时按顺序逐张渲染
+            
+        返回:
+            逐个产生 (任务, 渲染结果, 异常信息, 输出文件的字节数, 各阶段耗时) 的生成器，渲染结果与 _render_job 相同，
+            子进程抛出异常时渲染结果为None并给出异常信息
+        """
+        if workers <= 1 and pipeline_depth > 0:
+            yield from self._render_jobs_pipelined(jobs, pipeline_depth)
+            return
+        
+        if workers <= 1:
+            for job in jobs:
+                result, output_bytes, card_timings = self._render_job(job)
+                yield job, result, None, output_bytes, card_timings
+            return
+        
+        print(f"使用 {workers} 个进程并行生成图片")
+        max_pending = workers * 4
+        pending = deque()
+        
+        def collect(job: Tuple, future) -> Tuple[Tuple, object, Optional[str], int, Optional[Dict[str, float]]]:
+            try:
+                result, output_bytes, card_timings = future.result()
+                return job, result, None, output_bytes, card_timings
+            except Exception as e:
+                return job, None, str(e), 0, None
+        
+        jobs = iter(jobs)
+        restarts = 0
+        while True:
+            retry_job = None
+            # 每个子进程只接收一次生成器实例，之后只传递轻量的任务元组
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(self, workers)) as executor:
+                try:
+                    for job in jobs:
+                        retry_job = job
+                        pending.append((job, executor.submit(_run_worker_job, job)))
+                        retry_job = None
+                        if len(pending) >= max_pending:
+                            yield collect(*pending.popleft())
+                except BrokenProcessPool:
+                    pass
+                # 进程池损坏时，在途任务的 future.result() 会抛出 BrokenProcessPool，由 collect 记为失败
+                while pending:
+                    yield collect(*pending.popleft())
+            
+            if retry_job is None:
+                return
+            
+            # 提交任务时发现进程池已损坏: 重建进程池后从这个任务继续
+            jobs = itertools.chain([retry_job], jobs)
+            restarts += 1
+            if restarts > self.MAX_POOL_RESTARTS:
+                print(f"错误: 工作进程已异常退出 {restarts} 次，停止渲染剩余任务")
+                for job in jobs:
+                    yield job, None, "工作进程多次异常退出，未渲染", 0, None
+                return
+            print(f"警告: 工作进程异常退出，重新创建进程池（第 {restarts} 次）")
     
-    def process_word_list(self, word_list_file: str):
+    def _render_jobs_pipelined(self, jobs: Iterable[Tuple],
+                               depth: int) -> Iterator[Tuple[Tuple, object, Optional[str], int, Optional[Dict[str, float]]]]:
+        """
+        使用三个线程的流水线渲染任务: 读取线程读取并预处理背景，渲染线程绘制面板和文本，写入线程编码并写入文件
+        
+        各阶段之间是长度为 depth 的队列，前面的阶段领先太多时会阻塞等待，因此在途的卡片数量有上限；
+        读盘、解码和编码时会释放GIL，网络存储较慢时渲染线程仍然可以工作。
+        每个缓存只由一个线程访问: 背景缓存属于读取线程，排版、字体、面板和文本缓存属于渲染线程
+        
+        参数:
+            jobs: 渲染任务迭代器，在调用线程中逐个取出
+            depth: 队列长度
+            
+        返回:
+            按任务顺序逐个产生 (任务, 渲染结果, 异常信息, 输出文件的字节数, 各阶段耗时) 的生成器，格式与 _render_jobs 相同
+        """
+        load_queue = queue.Queue(maxsize=depth)
+        render_queue = queue.Queue(maxsize=depth)
+        write_queue = queue.Queue(maxsize=depth)
+        done_queue = queue.Queue()
+        cancelled = threading.Event()
+        
+        # 每个线程当前处理的卡片的阶段耗时，由阶段观察者按线程累计
+        local = threading.local()
+        previous_observer = self.stage_observer
+        timing = self.stage_timer is not None
+        generators = self.variants or [self]
+        
+        def observe(stage: str, seconds: float) -> None:
+            timings = getattr(local, "timings", None)
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + seconds
+            if previous_observer is not None:
+                previous_observer(stage, seconds)
+        
+        def load(card: List, texts: Tuple[str, str, str], image_path: str) -> None:
+            card[2] = card[0]._prepare_background(image_path)
+        
+        def draw(card: List, texts: Tuple[str, str, str], image_path: str) -> None:
+            card[0]._draw_card(card[2], *texts)
+        
+        def write(card: List, texts: Tuple[str, str, str], image_path: str) -> None:
+            with card[0]._stage("encode"):
+                card[4] = card[0].encoder.encode(card[2], card[1])
+            print(f"已生成图片: {card[1]}")
+            card[2] = None
+            card[3] = card[1]
+        
+        def run_stage(source: queue.Queue, target: queue.Queue, work: Callable) -> None:
+            """从 source 逐个取出卡片，处理后放入 target，收到结束标记时传给下一阶段后退出"""
+            while True:
+                item = source.get()
+                if item is None:
+                    target.put(None)
+                    return
+                job, texts, cards, timings = item
+                if not cancelled.is_set():
+                    local.timings = timings
+                    start = time.perf_counter()
+                    for card in cards:
+                        # 前面的阶段失败的卡片不再处理
+                        if card[2] is None and work is not load:
+                            continue
+                        try:
+                            work(card, texts, job[2])
+                        except Exception as e:
+                            print(f"处理图片 {job[2]} 时出错: {e}")
+                            card[2] = None
+                    if timings is not None:
+                        timings["card"] = timings.get("card", 0.0) + time.perf_counter() - start
+                    local.timings = None
+                target.put(item)
+        
+        if timing or previous_observer is not None:
+            for generator in generators:
+                generator.stage_observer = observe
+        
+        threads = [
+            threading.Thread(target=run_stage, args=(load_queue, render_queue, load), daemon=True),
+            threading.Thread(target=run_stage, args=(render_queue, write_queue, draw), daemon=True),
+            threading.Thread(target=run_stage, args=(write_queue, done_queue, write), daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        def finish(item: Tuple) -> Tuple[Tuple, object, Optional[str], int, Optional[Dict[str, float]]]:
+            job, _, cards, timings = item
+            results = tuple(card[3] for card in cards)
+            output_bytes = sum(card[4] for card in cards if card[3] is not None)
+            return job, results if self.variants else results[0], None, output_bytes, timings
+        
+        sentinel_sent = False
+        finished = False
+        try:
+            for job in jobs:
+                _, word_data, image_path, output_path = job
+                targets = output_path if self.variants else ((0, output_path),)
+                # 卡片: [生成器, 输出路径, 处理中的图片（失败时为None）, 成功时的输出路径, 写入的字节数]
+                cards = [[generators[index], path, None, None, 0] for index, path in targets]
+                load_queue.put((job, self._split_word_data(word_data), cards, {} if timing else None))
+                
+                # 不阻塞地取出已完成的卡片
+                while True:
+                    try:
+                        item = done_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    yield finish(item)
+            
+            load_queue.put(None)
+            sentinel_sent = True
+            while True:
+                item = done_queue.get()
+                if item is None:
+                    break
+                yield finish(item)
+            finished = True
+        finally:
+            if not finished:
+                # 提前结束时丢弃在途的卡片，等待各线程退出
+                cancelled.set()
+                if not sentinel_sent:
+                    load_queue.put(None)
+            for thread in threads:
+                thread.join()
+            for generator in generators:
+                generator.stage_observer = previous_observer if generator is self else None
+    
+    def select_background(self, index: int, word_data: Tuple) -> str:
+        """
+        为第 index 个单词选择背景图片
+        
+        选择结果只取决于序号、单词、图片列表和随机种子，不需要按单词数量复制图片列表，相同种子下多次运行结果一致
+        
+        参数:
+            index: 单词序号（从0开始）
+            word_data: 单词数据 (英文, 音标, 中文)
+            
+        返回:
+            背景图片路径
+        """
+        count = len(self.image_files)
+        
+        if self.bg_assignment == "round-robin":
+            # 按顺序轮流使用
+            position = index % count
+        elif self.bg_assignment == "hash":
+            # 按英文单词的哈希选择，同一个单词总是使用同一张背景
+            digest = hashlib.sha1(word_data[0].encode("utf-8")).digest()
+            position = int.from_bytes(digest[:8], "big") % count
+        else:
+            # 每轮使用一次所有图片，每轮的顺序由种子和轮次决定
+            cycle = index // count
+            cached_cycle, order = self._bg_cycle_order
+            if cached_cycle != cycle:
+                order = list(range(count))
+                random.Random(f"{self.seed}:{cycle}").shuffle(order)
+                self._bg_cycle_order = (cycle, order)
+            position = order[index % count]
+        
+        return str(self.image_files[position])
+    
+    def card_hash(self, word_data: Tuple, image_path: str) -> str:
+        """
+        计算单词卡片的内容哈希，用于判断已生成的图片是否需要重新渲染
+        
+        哈希覆盖单词内容、背景图片（路径、大小和修改时间）、主题、设备模式、背景样式、面板取整粒度、字体、解码、模糊和编码设置
+        
+        参数:
+            word_data: 单词数据 (英文, 音标, 中文)
+            image_path: 背景图片路径
+            
+        返回:
+            十六进制哈希字符串
+        """
+        stat = os.stat(image_path)
+        settings = {
+            "version": BuildManifest.VERSION,
+            "words": list(word_data),
+            "background": [os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns],
+            "theme": self.theme,
+            "device_mode": self.device_mode,
+            "bg_style": self.bg_style,
+            "panel_quantum": self.panel_quantum,
+            "encoder": self.encoder.settings(),
+            "draft_decode": self.draft_decode,
+            "blur": [self.blur_backend, self.blur_quality] if self.config["blur_radius"] > 0 else None,
+            "fonts": [
+                self._resolve_font_path(self.font_path_en, "en"), self.font_size_en,
+                self._resolve_font_path(self.font_path_cn, "cn"), self.font_size_cn,
+                self._resolve_font_path(self.font_path_en, "phonetic"), self.font_size_phonetic
+            ]
+        }
+        return hashlib.sha1(json.dumps(settings, ensure_ascii=False).encode("utf-8")).hexdigest()
+    
+    def read_word_list(self, word_list_file: str, delimiter: str = ",", has_header: bool = False) -> Iterator[Tuple[str, str, str]]:
+        """
+        逐行读取单词列表文件，使用csv模块解析，支持引号包裹的字段
+        
+        没有表头时，每行格式为 "英文,音标,中文" 或 "英文,中文"，三段式中第三列之后未加引号的内容会并入中文释义；
+        有表头时，按列名匹配英文(en/english/word)、音标(phonetic/ipa)和中文(cn/chinese/meaning)列
+        
+        参数:
+            word_list_file: 单词列表文件路径
+            delimiter: 字段分隔符，默认为逗号，TSV文件使用制表符
+            has_header: 第一行是否为表头
+            
+        返回:
+            逐个产生 (英文, 音标, 中文) 元组的生成器
+        """
+        header_aliases = {
+            "en": ("en", "english", "word", "英文", "单词"),
+            "phonetic": ("phonetic", "ipa", "音标"),
+            "cn": ("cn", "chinese", "meaning", "中文", "释义")
+        }
+        
+        with open(word_list_file, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter, skipinitialspace=True)
+            columns = None
+            
+            if has_header:
+                header = next(reader, None)
+                if header is None:
+                    return
+                names = [name.strip().lower() for name in header]
+                columns = {}
+                for key, aliases in header_aliases.items():
+                    for index, name in enumerate(names):
+                        if name in aliases:
+                            columns[key] = index
+                            break
+                if "en" not in columns or "cn" not in columns:
+                    print(f"错误: 表头中缺少英文或中文列: {header}")
+                    return
+            
+            for row in reader:
+                parts = [part.strip() for part in row]
+                if not any(parts):  # 跳过空行
+                    continue
+                
+                if columns is not None:
+                    # 按表头映射的列读取
+                    values = {key: parts[index] if index < len(parts) else "" for key, index in columns.items()}
+                    if values["en"] and values["cn"]:
+                        yield values["en"], values.get("phonetic", ""), values["cn"]
+                    else:
+                        print(f"警告: 第{reader.line_num}行缺少英文或中文，已跳过: {row}")
+                elif len(parts) >= 3:  # 三段式: 英文,音标,中文
+                    yield parts[0], parts[1], delimiter.join(parts[2:])
+                elif len(parts) == 2:  # 两段式: 英文,中文
+                    yield parts[0], "", parts[1]
+                else:
+                    print(f"警告: 第{reader.line_num}行格式不正确，已跳过: {row}")
+    
+    def process_word_list(self, word_list_file: str, workers: int = 1, delimiter: str = ",", has_header: bool = False,
+                          incremental: bool = True, metrics_file: Optional[str] = None, pipeline_depth: int = 0):
         """
         处理单词列表文件，为每个单词生成图片
         
+        单词列表以流的方式读取，读到第一行就开始渲染，内存占用与列表长度无关。
+        增量模式下，已生成且内容哈希未变化的图片会被跳过，中断后重新运行只会渲染剩余或有变化的卡片
+        
         参数:
             word_list_file: 单词列表文件路径，每行格式为 "英文,音标,中文" 或 "英文,中文"
+            workers: 并行渲染的进程数量，默认为1（顺序渲染）
+            delimiter: 字段分隔符，默认为逗号
+            has_header: 第一行是否为表头
+            incremental: 是否跳过输出目录中已生成且未变化的图片；同时决定未指定种子时是否沿用上次运行的种子
+            metrics_file: 各渲染阶段耗时统计的输出文件，.json 为JSON格式，其他为Prometheus文本格式；
+                          也可以预先设置 stage_timer 自行读取统计结果
+            pipeline_depth: 单进程渲染时读取、渲染、写入三个线程之间队列的长度，默认为0(按顺序逐张渲染)；
+                            只有一个渲染线程，且只在 workers 为1时生效，适合背景或输出位于较慢的存储上的情况
         """
         if not os.path.exists(word_list_file):
             print(f"错误: 单词列表文件 {word_list_file} 不存在")
             return
         
+        if not self.image_files:
+            print("错误: 没有可用的背景图片")
+            return
+        
+        manifest = BuildManifest(self.output_folder)
+        if metrics_file and self.stage_timer is None:
+            self.stage_timer = StageTimer()
+        
         try:
-            # 读取单词列表
-            word_pairs = []
-            with open(word_list_file, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:  # 跳过空行
-                        continue
+            # 未指定种子时沿用上次运行的种子，使背景分配不变，已生成的图片仍然有效
+            stored_seed = manifest.get_setting("seed")
+            if incremental and not self._seed_given and stored_seed is not None:
+                self.seed = int(stored_seed)
+                self._bg_cycle_order = (None, None)
+            manifest.set_setting("seed", str(self.seed))
+            
+            print(f"背景分配策略: {self.bg_assignment}，随机种子: {self.seed}")
+            print(f"输出编码: {', '.join(f'{key}={value}' for key, value in self.encoder.settings().items())}")
+            
+            # 多变体模式下每个单词生成所有变体，否则只用当前生成器
+            generators = self.variants or [self]
+            if self.variants:
+                print(f"多变体模式: 每个单词生成 {len(self.variants)} 个变体")
+            
+            total = 0
+            skipped = 0
+            failures = []
+            card_hashes = {}
+            
+            def iter_jobs() -> Iterator[Tuple]:
+                """逐个生成需要渲染的任务: (序号, 单词数据, 背景图片路径, 输出路径)"""
+                nonlocal total, skipped
+                for i, word_data in enumerate(self.read_word_list(word_list_file, delimiter, has_header)):
+                    total += 1
+                    
+                    # 选择背景图片
+                    image_path = self.select_background(i, word_data)
+                    
+                    # 生成输出文件名
+                    en_word = word_data[0]
+                    output_filename = f"{i+1:03d}_{en_word}{self.encoder.extension}"
+                    
+                    targets = []
+                    for index, generator in enumerate(generators):
+                        output_path = os.path.join(generator.output_folder, output_filename)
+                        
+                        # 跳过已生成且内容未变化的卡片
+                        card_hash = generator.card_hash(word_data, image_path)
+                        if (incremental and os.path.exists(output_path)
+                                and manifest.get(os.path.relpath(output_path, self.output_folder)) == card_hash):
+                            skipped += 1
+                            continue
                         
-                    parts = line.split(',')
-                    if len(parts) >= 3:  # 三段式: 英文,音标,中文
-                        en_word = parts[0].strip()
-                        phonetic = parts[1].strip()
-                        cn_word = parts[2].strip()
-                        word_pairs.append((en_word, phonetic, cn_word))
-                    elif len(parts) == 2:  # 两段式: 英文,中文
-                        en_word = parts[0].strip()
-                        cn_word = parts[1].strip()
-                        word_pairs.append((en_word, "", cn_word))
+                        card_hashes[output_path] = card_hash
+                        targets.append((index, output_path))
+                    
+                    if not targets:
+                        continue
+                    yield i, word_data, image_path, tuple(targets) if self.variants else targets[0][1]
+            
+            # 处理每对单词
+            for job, result, error, output_bytes, card_timings in self._render_jobs(iter_jobs(), workers, pipeline_depth):
+                if self.variants:
+                    output_paths = [output_path for _, output_path in job[3]]
+                    results = result if result is not None else [None] * len(output_paths)
+                else:
+                    output_paths, results = [job[3]], [result]
+                
+                for output_path, output in zip(output_paths, results):
+                    card_hash = card_hashes.pop(output_path)
+                    if output is not None:
+                        manifest.record(os.path.relpath(output_path, self.output_folder), card_hash)
                     else:
-                        print(f"警告: 第{line_num}行格式不正确，已跳过: '{line}'")
+                        failures.append((output_path, error or "渲染失败"))
+                if self.stage_timer is not None and card_timings:
+                    self.stage_timer.record_card(card_timings, output_bytes)
             
-            if not word_pairs:
+            if total == 0:
                 print("错误: 单词列表为空或格式不正确")
                 return
             
-            print(f"读取了 {len(word_pairs)} 对单词")
-            
-            # 如果有背景图片，但是数量不足，进行循环使用
-            if self.image_files and len(word_pairs) > len(self.image_files):
-                repeats = (len(word_pairs) // len(self.image_files)) + 1
-                self.image_files = self.image_files * repeats
+            print(f"共处理了 {total} 对单词")
+            if skipped:
+                print(f"跳过了 {skipped} 张已生成且未变化的图片")
             
-            # 随机打乱图片顺序，增加多样性
-            if self.image_files:
-                random.shuffle(self.image_files)
+            # 汇总失败的任务，单个任务失败不会中断整批处理
+            if failures:
+                print(f"共有 {len(failures)}/{total * len(generators)} 张图片生成失败:")
+                for output_path, reason in failures:
+                    print(f"  {output_path}: {reason}")
             
-            # 处理每对单词
-            for i, word_data in enumerate(word_pairs):
-                if not self.image_files:
-                    print("错误: 没有可用的背景图片")
-                    break
-                
-                # 选择背景图片
-                image_path = str(self.image_files[i % len(self.image_files)])
-                
-                # 生成输出文件名
-                en_word = word_data[0]
-                output_filename = f"{i+1:03d}_{en_word}.jpg"
-                output_path = os.path.join(self.output_folder, output_filename)
-                
-                # 处理图片
-                if len(word_data) == 3:  # 三段式
-                    self.add_text_to_image(image_path, word_data[0], word_data[1], word_data[2], output_path)
-                else:  # 两段式
-                    self.add_text_to_image(image_path, word_data[0], "", word_data[1], output_path)
+            # 输出各渲染阶段的耗时统计
+            if self.stage_timer is not None and self.stage_timer.cards:
+                print("各渲染阶段耗时:")
+                print(self.stage_timer.summary())
+                if metrics_file:
+                    self.stage_timer.save(metrics_file)
+                    print(f"阶段耗时统计已保存到 {metrics_file}")
         
         except Exception as e:
             print(f"处理单词列表时出错: {e}")
+        
+        finally:
+            manifest.close()
+
+
+# 子进程中使用的生成器实例，由 _init_worker 设置
+_worker_generator: Optional[ImageWordGenerator] = None
+
+
+def _init_worker(generator: ImageWordGenerator, workers: int) -> None:
+    """
+    进程池初始化函数，在每个子进程中保存生成器实例
+    
+    预处理背景缓存的内存上限由各进程平分，所有进程合计不超过设置的上限
+    
+    参数:
+        generator: 图片单词生成器实例
+        workers: 工作进程数量
+    """
+    global _worker_generator
+    for instance in [generator, *generator.variants]:
+        instance.bg_cache_bytes //= workers
+    _worker_generator = generator
+
+
+def _run_worker_job(job: Tuple) -> Tuple[Optional[str], int, Optional[Dict[str, float]]]:
+    """
+    在子进程中渲染单个任务
+    
+    参数:
+        job: (序号, 单词数据, 背景图片路径, 输出路径)
+        
+    返回:
+        (输出图片路径, 输出文件的字节数, 各阶段耗时)，出错时输出图片路径为None
+    """
+    return _worker_generator._render_job(job)
+
+
+def parse_variants(spec: str, theme: str, device_mode: str, bg_style: str) -> List[Tuple[str, str, str]]:
+    """
+    解析多变体矩阵，格式为 "主题列表:设备模式列表:背景样式列表"，列表内用逗号分隔
+    
+    省略或留空的部分使用单一变体的设置，例如 "standard,dark:mobile,tablet,desktop" 生成 2×3×1 个变体
+    
+    参数:
+        spec: 多变体矩阵字符串
+        theme: 默认主题
+        device_mode: 默认设备模式
+        bg_style: 默认背景样式
+        
+    返回:
+        (主题, 设备模式, 背景样式) 列表
+    """
+    parts = spec.split(":")
+    if len(parts) > 3:
+        raise ValueError(f"多变体矩阵格式不正确: {spec}")
+    parts += [""] * (3 - len(parts))
+    axes = []
+    for part, default in zip(parts, (theme, device_mode, bg_style)):
+        values = [value.strip() for value in part.split(",") if value.strip()]
+        axes.append(values or [default])
+    return [(t, d, b) for t in axes[0] for d in axes[1] for b in axes[2]]
 
 
 def main():
@@ -855,9 +2539,56 @@ def main():
                       help="设备模式: auto(自动), mobile(手机), tablet(平板), desktop(桌面)")
     parser.add_argument("--bg-style", default="rectangle", choices=["rectangle", "wave"],
                       help="背景样式: rectangle(矩形), wave(海浪形状)")
+    parser.add_argument("--workers", type=int, default=1, help="并行渲染的进程数量，默认为1（顺序渲染）")
+    parser.add_argument("--delimiter", default=",", help="单词列表的字段分隔符，默认为逗号，TSV文件可使用'\\t'")
+    parser.add_argument("--header", action="store_true", help="单词列表第一行为表头，按列名(en/phonetic/cn)匹配字段")
+    parser.add_argument("--bg-assignment", default="shuffle", choices=["shuffle", "round-robin", "hash"],
+                      help="背景分配策略: shuffle(每轮随机打乱), round-robin(按顺序轮流), hash(按单词哈希)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="背景分配的随机种子，不指定时沿用输出目录中上次运行的种子（--force 时重新随机生成）")
+    parser.add_argument("--metrics", help="各渲染阶段耗时统计的输出文件，.json 为JSON格式，其他扩展名为Prometheus文本格式")
+    parser.add_argument("--force", action="store_true", help="重新生成所有图片，不跳过输出目录中已生成且未变化的图片")
+    parser.add_argument("--bg-cache-mb", type=int, default=256, help="预处理背景缓存的内存上限(MB)，默认为256，为0时不缓存")
+    parser.add_argument("--format", default="jpeg", choices=list(ImageEncoder.EXTENSIONS),
+                      help="输出格式: jpeg, webp, png, raw(原始RGB数据)，默认为jpeg")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG/WebP 的质量(1-100)，默认为95")
+    parser.add_argument("--jpeg-optimize", action="store_true", help="JPEG 计算最优哈夫曼表，文件更小但编码更慢")
+    parser.add_argument("--jpeg-progressive", action="store_true", help="JPEG 使用渐进式编码")
+    parser.add_argument("--jpeg-subsampling", choices=["4:4:4", "4:2:2", "4:2:0"], help="JPEG 色度抽样，默认使用Pillow的设置")
+    parser.add_argument("--png-compress-level", type=int, default=6, choices=range(10), metavar="0-9",
+                      help="PNG 压缩级别，0最快、9最小，默认为6")
+    parser.add_argument("--webp-method", type=int, default=4, choices=range(7), metavar="0-6",
+                      help="WebP 压缩速度，0最快、6最小，默认为4")
+    parser.add_argument("--webp-lossless", action="store_true", help="WebP 使用无损压缩")
+    parser.add_argument("--blur-backend", default="gaussian", choices=["gaussian", "downscale", "box"],
+                      help="背景模糊方式: gaussian(PIL高斯模糊，默认), downscale(缩小后模糊再放大), box(OpenCV盒式模糊近似)")
+    parser.add_argument("--blur-quality", type=float, default=0.5,
+                      help="快速模糊的质量(0-1)，越小越快，默认为0.5；downscale下为缩小比例，box下决定模糊次数")
+    parser.add_argument("--no-draft", action="store_true",
+                      help="完整解码JPEG背景，不使用缩小解码（默认会直接解码到不小于设备分辨率的最小尺寸）")
+    parser.add_argument("--pipeline-depth", type=int, default=0,
+                        help="单进程渲染时读取/解码、渲染、编码/写入流水线各阶段之间的队列长度，默认为0（按顺序逐张渲染），"
+                             "仅在 --workers 为1时生效")
+    parser.add_argument("--variants", help="一次生成多个变体，格式为'主题列表:设备模式列表:背景样式列表'，"
+                                           "例如'standard,dark:mobile,tablet,desktop'，省略的部分使用--theme/--device/--bg-style")
     
     args = parser.parse_args()
     
+    variants = None
+    if args.variants:
+        variants = parse_variants(args.variants, args.theme, args.device, args.bg_style)
+        themes = ["standard", "focus", "elegant", "dark", "minimal"]
+        devices = ["auto", "mobile", "tablet", "desktop"]
+        bg_styles = ["rectangle", "wave"]
+        for theme, device_mode, bg_style in variants:
+            if theme not in themes or device_mode not in devices or bg_style not in bg_styles:
+                parser.error(f"无效的变体: {theme}:{device_mode}:{bg_style}")
+    
+    # 原始RGB数据没有文件头，尺寸只能由设备模式确定；auto模式下每张图片保持背景图片的尺寸，无法读取
+    device_modes = [device_mode for _, device_mode, _ in variants] if variants else [args.device]
+    if args.format == "raw" and "auto" in device_modes:
+        parser.error("--format raw 不能与 auto 设备模式同时使用，请指定 mobile、tablet 或 desktop")
+    
     # 创建图片单词生成器
     generator = ImageWordGenerator(
         images_folder=args.images,
@@ -869,11 +2600,31 @@ def main():
         font_path_cn=args.font_path_cn,
         theme=args.theme,
         device_mode=args.device,
-        bg_style=args.bg_style
+        bg_style=args.bg_style,
+        bg_cache_bytes=args.bg_cache_mb * 1024 * 1024,
+        bg_assignment=args.bg_assignment,
+        seed=args.seed,
+        variants=variants,
+        draft_decode=not args.no_draft,
+        blur_backend=args.blur_backend,
+        blur_quality=args.blur_quality,
+        encoder=ImageEncoder(
+            format=args.format,
+            quality=args.quality,
+            optimize=args.jpeg_optimize,
+            progressive=args.jpeg_progressive,
+            subsampling=args.jpeg_subsampling,
+            compress_level=args.png_compress_level,
+            webp_method=args.webp_method,
+            lossless=args.webp_lossless
+        )
     )
     
     # 处理单词列表
-    generator.process_word_list(args.words)
+    delimiter = "\t" if args.delimiter in ("\\t", "tab") else args.delimiter
+    generator.process_word_list(args.words, workers=args.workers, delimiter=delimiter, has_header=args.header,
+                                incremental=not args.force, metrics_file=args.metrics,
+                                pipeline_depth=args.pipeline_depth)
     
     print(f"处理完成，输出图片保存在 {args.output} 文件夹中")
     return 0
@@ -9,13 +9,22 @@ Python一分钟视频制造机
 import os
 import sys
 import argparse
+import bisect
+import hashlib
+import math
+import shutil
+import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import random
-from typing import List, Tuple, Dict, Optional
+import re
+from typing import List, Tuple, Dict, Optional, Iterator
 
 # 第三方库
 import cv2
+import imageio_ffmpeg
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import (
@@ -29,7 +38,15 @@ class OneMinuteVideoMaker:
                  output_file: str = "output.mp4",
                  target_duration: float = 60.0,
                  resolution: Tuple[int, int] = (1080, 1920),
-                 temp_dir: str = "temp"):
+                 temp_dir: str = "temp",
+                 engine: str = "ffmpeg",
+                 fps: int = 30,
+                 crossfade: float = 0.5,
+                 preset: str = "medium",
+                 dedup: bool = False,
+                 cache_images: bool = False,
+                 workers: int = 1,
+                 segment_duration: Optional[float] = None):
         """
         初始化视频制造机
         
@@ -38,17 +55,39 @@ class OneMinuteVideoMaker:
             target_duration: 目标视频时长(秒)
             resolution: 视频分辨率 (宽, 高)
             temp_dir: 临时文件目录
+            engine: 视频生成方式，"ffmpeg"(直接将画面写入ffmpeg) 或 "moviepy"(使用moviepy合成)
+            fps: 视频帧率
+            crossfade: 相邻图片之间交叉淡化的时长(秒)，为0时直接切换
+            preset: libx264 的编码速度预设，如 "ultrafast", "veryfast", "medium"
+            dedup: 连续相同的帧只生成和编码一次，输出可变帧率视频（仅ffmpeg方式）
+            cache_images: 是否将缩放裁剪后的图片缓存到临时目录，下次使用同一图片和分辨率时直接读取
+            workers: 并行编码的进程数量，大于1时将视频分段并行编码后直接拼接（仅ffmpeg方式）
+            segment_duration: 并行编码时每段的时长(秒)，不指定则每张图片为一段
         """
+        if engine not in ("ffmpeg", "moviepy"):
+            raise ValueError(f"不支持的视频生成方式: {engine}")
         self.output_file = output_file
         self.target_duration = target_duration
         self.resolution = resolution
         self.temp_dir = temp_dir
+        self.engine = engine
+        self.fps = fps
+        self.crossfade = crossfade
+        self.preset = preset
+        self.dedup = dedup
+        self.cache_images = cache_images
+        self.workers = workers
+        self.segment_duration = segment_duration
         
         # 创建临时目录
         os.makedirs(temp_dir, exist_ok=True)
         
-        # 视频片段列表
+        # 视频片段列表（moviepy方式）
         self.clips = []
+        # 幻灯片列表: (图片路径, 时长)
+        self.slides: List[Tuple[str, float]] = []
+        # 缩放裁剪后的图片缓存: 图片路径 -> RGB数组
+        self._slide_cache: Dict[str, np.ndarray] = {}
         
         print(f"初始化一分钟视频制造机 - 目标时长: {target_duration}秒")
     
@@ -83,18 +122,15 @@ class OneMinuteVideoMaker:
         
         print(f"每张图片时长: {duration_per_image:.2f}秒")
         
-        # 创建视频片段
+        self.slides.extend((str(img_path), duration_per_image) for img_path in image_files)
+        
+        # ffmpeg方式在生成视频时直接读取图片，不需要创建moviepy片段
+        if self.engine != "moviepy":
+            return
+        
+        # 创建视频片段: 图片预先缩放裁剪到视频分辨率，避免moviepy在每一帧重新缩放
         for img_path in image_files:
-            img_clip = ImageClip(str(img_path), duration=duration_per_image)
-            img_clip = img_clip.resize(height=self.resolution[1])
-            
-            # 居中裁剪以适应分辨率
-            if img_clip.w > self.resolution[0]:
-                x_center = img_clip.w / 2
-                x1 = max(0, x_center - self.resolution[0] / 2)
-                img_clip = img_clip.crop(x1=x1, y1=0, 
-                                         width=self.resolution[0], 
-                                         height=self.resolution[1])
+            img_clip = ImageClip(self._prepare_slide(str(img_path)), duration=duration_per_image)
             
             # 应用简单的淡入淡出效果
             img_clip = img_clip.crossfadein(0.5).crossfadeout(0.5)
@@ -103,6 +139,514 @@ class OneMinuteVideoMaker:
     
     def create_video(self):
         """生成最终视频"""
+        if self.engine == "ffmpeg":
+            return self._create_video_ffmpeg()
+        return self._create_video_moviepy()
+    
+    def _load_slide(self, image_path: str) -> np.ndarray:
+        """
+        读取图片，等比缩放到刚好覆盖视频分辨率后居中裁剪
+        
+        参数:
+            image_path: 图片路径
+            
+        返回:
+            高×宽×3 的RGB数组
+        """
+        width, height = self.resolution
+        with Image.open(image_path) as img:
+            img = img.convert("RGB")
+            scale = max(width / img.width, height / img.height)
+            new_width = max(width, round(img.width * scale))
+            new_height = max(height, round(img.height * scale))
+            img = img.resize((new_width, new_height), Image.LANCZOS)
+            left = (new_width - width) // 2
+            top = (new_height - height) // 2
+            img = img.crop((left, top, left + width, top + height))
+            return np.asarray(img)
+    
+    def _slide_cache_path(self, image_path: str) -> str:
+        """
+        计算图片在磁盘缓存中的路径，由图片路径、修改时间和视频分辨率决定
+        
+        参数:
+            image_path: 图片路径
+            
+        返回:
+            缓存文件路径
+        """
+        path = os.path.abspath(image_path)
+        key = f"{path}|{os.stat(path).st_mtime_ns}|{self.resolution[0]}x{self.resolution[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.temp_dir, "slides", f"{digest}.npy")
+    
+    def _prepare_slide(self, image_path: str) -> np.ndarray:
+        """
+        获取缩放裁剪后的图片，每张图片只解码和缩放一次
+        
+        依次查找内存缓存、磁盘缓存(启用 cache_images 时)，都没有时读取图片并缩放裁剪
+        
+        参数:
+            image_path: 图片路径
+            
+        返回:
+            高×宽×3 的RGB数组
+        """
+        image = self._slide_cache.get(image_path)
+        if image is not None:
+            return image
+        
+        cache_path = self._slide_cache_path(image_path) if self.cache_images else None
+        if cache_path and os.path.exists(cache_path):
+            image = np.load(cache_path)
+        else:
+            image = self._load_slide(image_path)
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                # 先写入临时文件再改名，避免留下写了一半的缓存
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    np.save(f, image)
+                os.replace(temp_path, cache_path)
+        
+        self._slide_cache[image_path] = image
+        return image
+    
+    def _frame_runs(self, frame_count: int, start_frame: int = 0,
+                    end_frame: Optional[int] = None) -> Iterator[Tuple[int, Optional[int], float, int]]:
+        """
+        计算每一帧的画面，将连续相同的帧合并
+        
+        幻灯片总时长短于视频时长时循环播放；相邻图片在切换点前后各 crossfade/2 秒内交叉淡化
+        
+        参数:
+            frame_count: 视频总帧数
+            start_frame: 从第几帧开始
+            end_frame: 到第几帧为止(不含)，不指定则到视频结尾
+            
+        返回:
+            逐个产生 (图片序号, 淡入的下一张图片序号, 下一张图片的权重, 连续帧数) 的生成器，
+            不在淡化区间内时下一张图片序号为None
+        """
+        starts = [0.0]
+        for _, duration in self.slides:
+            starts.append(starts[-1] + duration)
+        base_duration = starts[-1]
+        cycle_frames = self._cycle_frames()
+        count = len(self.slides)
+        total_duration = frame_count / self.fps
+        half = self.crossfade / 2
+        
+        if end_frame is None:
+            end_frame = frame_count
+        
+        run, run_length = None, 0
+        for frame in range(start_frame, end_frame):
+            if cycle_frames:
+                # 每一轮正好是整数帧时按帧计算，保证每一轮对应的帧完全相同
+                cycle, offset = divmod(frame, cycle_frames)
+                cycle_start = cycle * base_duration
+                t = offset / self.fps
+            else:
+                time_point = frame / self.fps
+                cycle_start = time_point - time_point % base_duration
+                t = time_point - cycle_start
+            index = min(bisect.bisect_right(starts, t) - 1, count - 1)
+            key = (index, None, 0.0)
+            
+            if half > 0:
+                # 本张图片开头: 从上一张图片淡入（循环播放时第一张从最后一张淡入）
+                if t - starts[index] < half and (index > 0 or cycle_start > 0):
+                    key = ((index - 1) % count, index, 0.5 + (t - starts[index]) / self.crossfade)
+                # 本张图片结尾: 淡出到下一张图片
+                elif starts[index + 1] - t <= half and (index < count - 1 or cycle_start + base_duration < total_duration):
+                    key = (index, (index + 1) % count, 0.5 - (starts[index + 1] - t) / self.crossfade)
+            
+            if key == run:
+                run_length += 1
+                continue
+            if run is not None:
+                yield run + (run_length,)
+            run, run_length = key, 1
+        
+        if run is not None:
+            yield run + (run_length,)
+    
+    def _cycle_frames(self) -> Optional[int]:
+        """
+        计算幻灯片播放一轮的帧数
+        
+        返回:
+            一轮的帧数，一轮的时长不是整数帧时为None
+        """
+        cycle_frames = sum(duration for _, duration in self.slides) * self.fps
+        if abs(cycle_frames - round(cycle_frames)) > 1e-6:
+            return None
+        return int(round(cycle_frames))
+    
+    @staticmethod
+    def _blend(first: np.ndarray, second: np.ndarray, weight: float) -> np.ndarray:
+        """
+        按权重混合两张图片
+        
+        参数:
+            first: 第一张图片
+            second: 第二张图片
+            weight: 第二张图片的权重，0-1
+            
+        返回:
+            混合后的图片
+        """
+        weight = min(max(weight, 0.0), 1.0)
+        return cv2.addWeighted(first, 1.0 - weight, second, weight, 0.0)
+    
+    def _ffmpeg_command(self, output_file: str, input_args: List[str], variable_frame_rate: bool = False) -> List[str]:
+        """
+        生成调用ffmpeg编码视频的命令
+        
+        参数:
+            output_file: 输出视频路径
+            input_args: 输入部分的参数
+            variable_frame_rate: 是否输出可变帧率视频（保留输入中每一帧的时长，不补齐重复帧）
+            
+        返回:
+            命令参数列表
+        """
+        if variable_frame_rate:
+            # 时间基设为 1/fps，使每个画面的时长都能精确表示
+            frame_rate_args = ["-fps_mode", "vfr", "-enc_time_base", f"1/{self.fps}"]
+        else:
+            frame_rate_args = ["-r", str(self.fps)]
+        return [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error", *input_args,
+                "-an", "-c:v", "libx264", "-preset", self.preset, "-pix_fmt", "yuv420p",
+                *frame_rate_args, output_file]
+    
+    @staticmethod
+    def _ffmpeg_supports_vfr() -> bool:
+        """
+        检查ffmpeg是否支持去除重复帧所需的 -fps_mode、-enc_time_base 和 ffconcat 的 option 指令(5.1及以上版本)
+        
+        返回:
+            是否支持，无法识别版本号(例如自行编译的开发版)时视为支持
+        """
+        match = re.match(r"n?(\d+)\.(\d+)", imageio_ffmpeg.get_ffmpeg_version())
+        return match is None or (int(match.group(1)), int(match.group(2))) >= (5, 1)
+    
+    def _run_ffmpeg(self, command: List[str], frames: Optional[Iterator[np.ndarray]] = None) -> bool:
+        """
+        运行ffmpeg，可选地将原始画面逐帧写入其标准输入
+        
+        参数:
+            command: ffmpeg命令
+            frames: 要写入标准输入的RGB画面，不指定则不使用标准输入
+            
+        返回:
+            是否运行成功，失败时打印ffmpeg的错误输出
+        """
+        log_path = os.path.join(self.temp_dir, f"ffmpeg_{os.getpid()}_{time.perf_counter_ns()}.log")
+        with open(log_path, "wb") as log:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+                                       stderr=log)
+            if frames is not None:
+                try:
+                    for frame in frames:
+                        process.stdin.write(frame)
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = process.wait()
+        
+        with open(log_path, "r", encoding="utf-8", errors="replace") as log:
+            message = log.read()
+        os.remove(log_path)
+        if returncode != 0:
+            print(f"错误: ffmpeg 编码失败:\n{message}")
+            return False
+        return True
+    
+    def _frame_count(self) -> int:
+        """
+        计算视频总帧数，与moviepy方式相同: 幻灯片总时长与目标时长相差超过1秒时裁剪或循环到目标时长
+        
+        返回:
+            总帧数
+        """
+        base_duration = sum(duration for _, duration in self.slides)
+        duration = base_duration
+        if abs(base_duration - self.target_duration) > 1.0:
+            if base_duration > self.target_duration:
+                print(f"视频时长 ({base_duration:.2f}秒) 超过目标时长，进行裁剪...")
+            else:
+                print(f"视频时长 ({base_duration:.2f}秒) 小于目标时长，进行循环...")
+            duration = self.target_duration
+        return max(1, int(round(duration * self.fps)))
+    
+    def _create_video_ffmpeg(self) -> bool:
+        """
+        使用ffmpeg生成视频
+        
+        每张图片只读取和缩放一次，只有交叉淡化区间内的帧需要计算
+        
+        返回:
+            是否生成成功
+        """
+        if not self.slides:
+            print("错误: 没有添加任何视频内容")
+            return False
+        
+        print("开始生成视频...")
+        start = time.perf_counter()
+        if self.dedup and not self._ffmpeg_supports_vfr():
+            print(f"警告: ffmpeg {imageio_ffmpeg.get_ffmpeg_version()} 不支持可变帧率输出(需要5.1及以上版本)，"
+                  "不进行重复帧去除")
+            self.dedup = False
+        frame_count = self._frame_count()
+        images = [self._prepare_slide(path) for path, _ in self.slides]
+        
+        print(f"正在写入视频到 {self.output_file}...")
+        cycle_frames = self._cycle_frames()
+        if self.workers > 1 or (cycle_frames and cycle_frames < frame_count):
+            # 循环播放时每一轮相同的片段只编码一次，拼接时重复使用
+            success = self._encode_segments(frame_count, self.output_file)
+        elif self.dedup:
+            success = self._encode_dedup(images, frame_count, self.output_file)
+        else:
+            success = self._encode_stream(images, frame_count, self.output_file)
+        if not success:
+            return False
+        
+        print(f"视频生成完成: {self.output_file}")
+        print(f"视频时长: {frame_count / self.fps:.2f}秒，耗时 {time.perf_counter() - start:.2f}秒")
+        return True
+    
+    def _encode_stream(self, images: List[np.ndarray], frame_count: int, output_file: str,
+                       start_frame: int = 0, end_frame: Optional[int] = None) -> bool:
+        """
+        逐帧生成画面并通过管道写入ffmpeg，静止画面直接重复写入同一个缓冲区
+        
+        参数:
+            images: 缩放裁剪后的幻灯片图片
+            frame_count: 总帧数
+            output_file: 输出视频路径
+            start_frame: 从第几帧开始编码
+            end_frame: 编码到第几帧为止(不含)，不指定则到视频结尾
+            
+        返回:
+            是否编码成功
+        """
+        width, height = self.resolution
+        
+        def frames() -> Iterator[np.ndarray]:
+            for index, next_index, weight, repeat in self._frame_runs(frame_count, start_frame, end_frame):
+                if next_index is None:
+                    frame = images[index]
+                else:
+                    frame = self._blend(images[index], images[next_index], weight)
+                for _ in range(repeat):
+                    yield frame
+        
+        command = self._ffmpeg_command(output_file, [
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", str(self.fps), "-i", "-"
+        ])
+        return self._run_ffmpeg(command, frames())
+    
+    def _encode_dedup(self, images: List[np.ndarray], frame_count: int, output_file: str,
+                      start_frame: int = 0, end_frame: Optional[int] = None) -> bool:
+        """
+        连续相同的帧只生成一次: 每个不同的画面保存为一个图片文件，通过concat demuxer指定每个画面的时长，
+        输出可变帧率视频，静止画面只编码一帧
+        
+        参数:
+            images: 缩放裁剪后的幻灯片图片
+            frame_count: 总帧数
+            output_file: 输出视频路径
+            start_frame: 从第几帧开始编码
+            end_frame: 编码到第几帧为止(不含)，不指定则到视频结尾
+            
+        返回:
+            是否编码成功
+        """
+        frames_dir = os.path.join(self.temp_dir, f"frames_{os.getpid()}_{time.perf_counter_ns()}")
+        os.makedirs(frames_dir, exist_ok=True)
+        try:
+            slide_files = {}
+            entries = []
+            for index, next_index, weight, repeat in self._frame_runs(frame_count, start_frame, end_frame):
+                if next_index is None:
+                    # 静止画面: 同一张图片的所有静止片段共用一个文件
+                    path = slide_files.get(index)
+                    if path is None:
+                        path = os.path.join(frames_dir, f"slide_{index:04d}.ppm")
+                        Image.fromarray(images[index]).save(path)
+                        slide_files[index] = path
+                else:
+                    path = os.path.join(frames_dir, f"frame_{len(entries):06d}.ppm")
+                    Image.fromarray(self._blend(images[index], images[next_index], weight)).save(path)
+                entries.append((path, repeat))
+            
+            list_path = os.path.join(frames_dir, "frames.ffconcat")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                # concat demuxer 会忽略最后一个文件的时长，最后一帧单独列出，前面的画面少占一帧
+                last_path, last_repeat = entries[-1]
+                entries[-1] = (last_path, last_repeat - 1)
+                # 图片默认按25fps读取，时间戳会被取整到1/25秒，指定帧率使每个画面的时长精确到帧
+                option = f"option framerate {self.fps}\n"
+                for path, repeat in entries:
+                    if repeat > 0:
+                        f.write(f"file '{os.path.abspath(path)}'\n{option}duration {repeat / self.fps:.6f}\n")
+                f.write(f"file '{os.path.abspath(last_path)}'\n{option}")
+            
+            print(f"共 {(end_frame or frame_count) - start_frame} 帧，其中不同的画面 {len(entries)} 个")
+            command = self._ffmpeg_command(output_file, ["-f", "concat", "-safe", "0", "-i", list_path],
+                                           variable_frame_rate=True)
+            return self._run_ffmpeg(command)
+        finally:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+    
+    def _segment_bounds(self, frame_count: int) -> List[Tuple[int, int]]:
+        """
+        将视频划分为多段
+        
+        并行编码时按 segment_duration 等长划分，未指定时在每张图片的起点处划分；
+        循环播放时还在每一轮的起点和第一张图片淡入结束处划分，使中间各轮的片段完全相同
+        
+        参数:
+            frame_count: 视频总帧数
+            
+        返回:
+            每段的 (起始帧, 结束帧) 列表，结束帧不含
+        """
+        cuts = {0}
+        cycle_frames = self._cycle_frames()
+        if cycle_frames and cycle_frames < frame_count:
+            fade_frames = math.ceil(self.crossfade / 2 * self.fps)
+            for cycle_start in range(cycle_frames, frame_count, cycle_frames):
+                cuts.add(cycle_start)
+                if 0 < fade_frames < cycle_frames:
+                    cuts.update(cut for cut in (fade_frames, cycle_start + fade_frames) if cut < frame_count)
+        
+        if self.workers > 1 and self.segment_duration:
+            step = max(1, int(round(self.segment_duration * self.fps)))
+            cuts.update(range(0, frame_count, step))
+        elif self.workers > 1:
+            starts = [0.0]
+            for _, duration in self.slides[:-1]:
+                starts.append(starts[-1] + duration)
+            base_duration = sum(duration for _, duration in self.slides)
+            cycle_start = 0.0
+            # 幻灯片循环播放时每一轮都在图片起点处划分
+            while int(round(cycle_start * self.fps)) < frame_count:
+                for start in starts:
+                    cut = int(round((cycle_start + start) * self.fps))
+                    if cut < frame_count:
+                        cuts.add(cut)
+                cycle_start += base_duration
+        cuts = sorted(cuts)
+        return list(zip(cuts, cuts[1:] + [frame_count]))
+    
+    def _segment_key(self, frame_count: int, start_frame: int, end_frame: int) -> Tuple:
+        """
+        计算片段内容的标识，标识相同的片段画面完全相同，只需要编码一次
+        
+        循环播放时，同一轮内位置相同的片段除了开头的淡入(非第一轮)和结尾的淡出(非最后一轮)之外完全相同
+        
+        参数:
+            frame_count: 视频总帧数
+            start_frame: 起始帧
+            end_frame: 结束帧(不含)
+            
+        返回:
+            片段标识
+        """
+        cycle_frames = self._cycle_frames()
+        if not cycle_frames or cycle_frames >= frame_count:
+            return (start_frame, end_frame)
+        
+        cycle, offset = divmod(start_frame, cycle_frames)
+        end_offset = offset + end_frame - start_frame
+        fade_frames = math.ceil(self.crossfade / 2 * self.fps)
+        fade_in = cycle > 0 and offset < fade_frames
+        fade_out = (cycle + 1) * cycle_frames < frame_count and end_offset >= cycle_frames - fade_frames - 1
+        return (offset, end_offset, fade_in, fade_out)
+    
+    def _encode_segment(self, frame_count: int, output_file: str, start_frame: int, end_frame: int) -> bool:
+        """
+        编码视频中的一段，并行编码时在子进程中调用
+        
+        参数:
+            frame_count: 视频总帧数
+            output_file: 这一段的输出路径
+            start_frame: 起始帧
+            end_frame: 结束帧(不含)
+            
+        返回:
+            是否编码成功
+        """
+        images = [self._prepare_slide(path) for path, _ in self.slides]
+        encode = self._encode_dedup if self.dedup else self._encode_stream
+        return encode(images, frame_count, output_file, start_frame, end_frame)
+    
+    def _encode_segments(self, frame_count: int, output_file: str) -> bool:
+        """
+        将视频分段编码(workers大于1时用进程池并行)，再通过concat demuxer直接复制视频流拼接
+        
+        每一段都是独立编码的，第一帧就是关键帧，因此拼接时不需要重新编码；
+        画面相同的片段(循环播放的各轮)只编码一次，在拼接列表中重复使用
+        
+        参数:
+            frame_count: 视频总帧数
+            output_file: 输出视频路径
+            
+        返回:
+            是否编码成功
+        """
+        segments_dir = os.path.join(self.temp_dir, f"segments_{os.getpid()}_{time.perf_counter_ns()}")
+        os.makedirs(segments_dir, exist_ok=True)
+        try:
+            segment_files = []
+            jobs = {}
+            for start_frame, end_frame in self._segment_bounds(frame_count):
+                key = self._segment_key(frame_count, start_frame, end_frame)
+                if key not in jobs:
+                    segment_file = os.path.join(segments_dir, f"segment_{len(jobs):04d}.mp4")
+                    jobs[key] = (frame_count, segment_file, start_frame, end_frame)
+                segment_files.append(jobs[key][1])
+            jobs = list(jobs.values())
+            print(f"视频分为 {len(segment_files)} 段，其中需要编码 {len(jobs)} 段")
+            
+            workers = min(self.workers, len(jobs))
+            if workers > 1:
+                print(f"使用 {workers} 个进程并行编码")
+                # 每个子进程只接收一次视频制造机实例(含缩放后的图片)，之后只传递每段的帧范围
+                try:
+                    with ProcessPoolExecutor(max_workers=workers,
+                                             initializer=_init_segment_worker,
+                                             initargs=(self,)) as executor:
+                        results = list(executor.map(_run_segment_job, jobs))
+                except BrokenProcessPool as e:
+                    print(f"错误: 编码进程异常退出: {e}")
+                    return False
+            else:
+                results = [self._encode_segment(*job) for job in jobs]
+            if not all(results):
+                return False
+            
+            list_path = os.path.join(segments_dir, "segments.ffconcat")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                for segment_file in segment_files:
+                    f.write(f"file '{os.path.abspath(segment_file)}'\n")
+            
+            command = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                       "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_file]
+            return self._run_ffmpeg(command)
+        finally:
+            shutil.rmtree(segments_dir, ignore_errors=True)
+    
+    def _create_video_moviepy(self) -> bool:
+        """使用moviepy合成并生成视频"""
         if not self.clips:
             print("错误: 没有添加任何视频内容")
             return False
@@ -113,27 +657,41 @@ class OneMinuteVideoMaker:
         final_clip = concatenate_videoclips(self.clips)
         
         # 确保视频时长为一分钟
+        loop = False
         if abs(final_clip.duration - self.target_duration) > 1.0:
             if final_clip.duration > self.target_duration:
                 print(f"视频时长 ({final_clip.duration:.2f}秒) 超过目标时长，进行裁剪...")
                 final_clip = final_clip.subclip(0, self.target_duration)
             else:
+                # 只编码一轮，之后由ffmpeg在容器层面循环，不重新编码
                 print(f"视频时长 ({final_clip.duration:.2f}秒) 小于目标时长，进行循环...")
-                repeat_times = int(self.target_duration / final_clip.duration) + 1
-                final_clip = concatenate_videoclips([final_clip] * repeat_times).subclip(0, self.target_duration)
+                loop = True
         
         # 写入文件
         print(f"正在写入视频到 {self.output_file}...")
+        base_file = os.path.join(self.temp_dir, f"loop_{os.getpid()}.mp4") if loop else self.output_file
         final_clip.write_videofile(
-            self.output_file, 
+            base_file, 
             codec='libx264', 
             temp_audiofile=os.path.join(self.temp_dir, "temp_audio.m4a"),
             remove_temp=True,
-            fps=30
+            fps=self.fps,
+            preset=self.preset
         )
         
+        duration = final_clip.duration
+        if loop:
+            command = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                       "-stream_loop", "-1", "-i", base_file,
+                       "-t", f"{self.target_duration:.6f}", "-c", "copy", self.output_file]
+            success = self._run_ffmpeg(command)
+            os.remove(base_file)
+            if not success:
+                return False
+            duration = self.target_duration
+        
         print(f"视频生成完成: {self.output_file}")
-        print(f"视频时长: {final_clip.duration:.2f}秒")
+        print(f"视频时长: {duration:.2f}秒")
         return True
     
     def cleanup(self):
@@ -144,6 +702,34 @@ class OneMinuteVideoMaker:
             print(f"已清理临时文件目录: {self.temp_dir}")
 
 
+# 子进程中使用的视频制造机实例，由 _init_segment_worker 设置
+_worker_maker: Optional[OneMinuteVideoMaker] = None
+
+
+def _init_segment_worker(maker: OneMinuteVideoMaker) -> None:
+    """
+    进程池初始化函数，在每个子进程中保存视频制造机实例
+    
+    参数:
+        maker: 视频制造机实例
+    """
+    global _worker_maker
+    _worker_maker = maker
+
+
+def _run_segment_job(job: Tuple[int, str, int, int]) -> bool:
+    """
+    在子进程中编码视频的一段
+    
+    参数:
+        job: (视频总帧数, 输出路径, 起始帧, 结束帧)
+        
+    返回:
+        是否编码成功
+    """
+    return _worker_maker._encode_segment(*job)
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="Python一分钟视频制造机")
@@ -152,13 +738,30 @@ def main():
     parser.add_argument("--output", default="一分钟视频.mp4", help="输出视频文件路径")
     parser.add_argument("--duration", type=float, default=60.0, help="视频时长(秒)")
     parser.add_argument("--cleanup", action="store_true", help="完成后清理临时文件")
+    parser.add_argument("--engine", default="ffmpeg", choices=["ffmpeg", "moviepy"],
+                        help="视频生成方式: ffmpeg(直接将画面写入ffmpeg，默认), moviepy(使用moviepy合成)")
+    parser.add_argument("--fps", type=int, default=30, help="视频帧率，默认为30")
+    parser.add_argument("--crossfade", type=float, default=0.5, help="相邻图片交叉淡化的时长(秒)，默认为0.5，为0时直接切换")
+    parser.add_argument("--preset", default="medium", help="libx264 编码速度预设，默认为medium，可选ultrafast、veryfast等")
+    parser.add_argument("--dedup", action="store_true", help="连续相同的帧只生成和编码一次，输出可变帧率视频（仅ffmpeg方式）")
+    parser.add_argument("--cache-images", action="store_true", help="将缩放裁剪后的图片缓存到临时目录，重复生成时不再解码和缩放")
+    parser.add_argument("--workers", type=int, default=1, help="并行编码的进程数量，大于1时分段并行编码后拼接（仅ffmpeg方式）")
+    parser.add_argument("--segment-duration", type=float, default=None, help="并行编码时每段的时长(秒)，默认每张图片为一段")
     
     args = parser.parse_args()
     
     # 创建视频制造机
     maker = OneMinuteVideoMaker(
         output_file=args.output,
-        target_duration=args.duration
+        target_duration=args.duration,
+        engine=args.engine,
+        fps=args.fps,
+        crossfade=args.crossfade,
+        preset=args.preset,
+        dedup=args.dedup,
+        cache_images=args.cache_images,
+        workers=args.workers,
+        segment_duration=args.segment_duration
     )
     
     # 添加图片